@@ -1,7 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
+from fastapi.responses import ORJSONResponse
 from app.routers import viz_pro, scientific_db
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # 啟動時在背景預讀 regulon.db (posix_fadvise)，不阻塞啟動與請求
+    scientific_db.start_prefetch()
+    yield
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+# NDJSON (/network?format=ndjson) 不壓縮：gzip 會把分批送出的 edge 留在壓縮緩衝區，前端就無法邊收邊解析
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5,
+                   exclude_content_types=(*DEFAULT_EXCLUDED_CONTENT_TYPES, "application/x-ndjson"))
 
 app.include_router(viz_pro.router)
 app.include_router(scientific_db.router)
\ No newline at end of file
@@ -21,6 +21,7 @@ import networkx as nx
 import requests
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import HTMLResponse, StreamingResponse
 from pyvis.network import Network as PyVisNetwork
 
@@ -729,6 +730,7 @@ def _csv_bytes(rows: List[Dict[str, Any]], fieldnames: List[str]) -> bytes:
 # FastAPI
 # ----------------------------
 app = FastAPI(title=APP_NAME, version="0.5.0")
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 def network_params(
     seed: List[str] = Query(..., description="Repeatable: ?seed=TP53&seed=BRCA1"),
@@ -1892,9 +1894,25 @@ def _default_min_coverage_v1(mode: str, n: int) -> int:
         return 1
     return int(math.ceil(n / 2))
 
+def _edge_index_v1(netw: Dict[str, Any]) -> Dict[str, List[int]]:
+    # node id -> positions in netw["edges"]; built once and kept on the network dict
+    idx = netw.get("_idx")
+    if idx is None:
+        from collections import defaultdict
+        acc = defaultdict(list)
+        for i, e in enumerate(netw.get("edges", [])):
+            a = e.get("source")
+            b = e.get("target")
+            if not a or not b:
+                continue
+            acc[a].append(i)
+            acc[b].append(i)
+        idx = dict(acc)
+        netw["_idx"] = idx
+    return idx
+
 def _regulon_overlap_v1(netw: Dict[str, Any], seeds: List[str], min_coverage: int, top: int, exclude_seed_nodes: bool = True) -> Dict[str, Any]:
     import math
-    from collections import defaultdict
 
     seeds = [str(s).strip() for s in (seeds or []) if str(s).strip()]
     seen = set()
@@ -1911,23 +1929,16 @@ def _regulon_overlap_v1(netw: Dict[str, Any], seeds: List[str], min_coverage: in
 
     node_kind = {n.get("id"): n.get("kind", "unknown") for n in netw.get("nodes", []) if n.get("id")}
 
-    deg = defaultdict(int)
-    adj = defaultdict(list)
-    for e in netw.get("edges", []):
-        a = e.get("source")
-        b = e.get("target")
-        if not a or not b:
-            continue
-        deg[a] += 1
-        deg[b] += 1
-        adj[a].append((b, e))
-        adj[b].append((a, e))
+    edges = netw.get("edges", [])
+    idx = _edge_index_v1(netw)
 
     seeds_set = set(seeds)
     items: Dict[str, Any] = {}
 
     for seed in seeds:
-        for nbr, e in adj.get(seed, []):
+        for ei in idx.get(seed, ()):
+            e = edges[ei]
+            nbr = e.get("target") if e.get("source") == seed else e.get("source")
             if exclude_seed_nodes and nbr in seeds_set:
                 continue
 
@@ -1940,7 +1951,7 @@ def _regulon_overlap_v1(netw: Dict[str, Any], seeds: List[str], min_coverage: in
                     "seed_best": {},
                     "db_set": set(),
                     "evidence": [],
-                    "degree": int(deg.get(nbr, 0)),
+                    "degree": len(idx.get(nbr, ())),
                 }
                 items[nbr] = it
 
@@ -2229,12 +2240,133 @@ def viz_regulon_v1(
 # /viz/regulon3 : clean bipartite regulon view + dedup edges + LR layout + details panel
 # ============================
 
+# page template split around the data so /viz/regulon3 can stream it (see viz_regulon_v3)
+_REGULON3_TPL_PREFIX = r"""<!doctype html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <title>Regulon network (pro)</title>
+  <script src="https://unpkg.com/vis-network/standalone/umd/vis-network.min.js"></script>
+  <style>
+    body{font-family:Segoe UI,Arial;padding:18px}
+    #wrap{display:flex;gap:12px}
+    #net{flex:3;height:780px;border:1px solid #eee;border-radius:10px}
+    #panel{flex:1;height:780px;border:1px solid #eee;border-radius:10px;padding:10px;overflow:auto;
+           white-space:pre-wrap;font-family:Consolas,monospace;font-size:12px}
+    .muted{color:#666;font-size:13px;margin-top:6px}
+    .row{display:flex;gap:10px;align-items:center;flex-wrap:wrap;margin-top:10px}
+    input{padding:6px 8px;min-width:240px}
+    button{padding:6px 10px;cursor:pointer}
+  </style>
+</head>
+<body>
+  <h2>Regulon network</h2>
+  <div class="muted">
+    Clean bipartite view (seeds → shared interactors). Parallel edges are merged. Click node/edge for details.
+  </div>
+
+  <div class="row">
+    <b>Find node:</b>
+    <input id="q" placeholder="e.g. TP53, BRCA1, MALAT1">
+    <button id="go">Go</button>
+    <span class="muted">labels: __LABELS__ (use &labels=all|top|none)</span>
+  </div>
+
+  <div id="wrap">
+    <div id="net"></div>
+    <div id="panel">Click a node/edge to view details here.</div>
+  </div>
+
+<script>
+  const nodes = new vis.DataSet("""
+
+_REGULON3_TPL_SUFFIX = r"""
+  const container = document.getElementById("net");
+  const network = new vis.Network(container, {nodes, edges}, options);
+
+  function isSingletonOf(seed, id){
+    const info = nodeInfo[id];
+    return !!info && info.role === "interactor" && info.coverage === 1 && info.hit_seeds[0] === seed;
+  }
+
+  if (clusterSingletons) {
+    nodes.getIds({filter: (n) => n.level === 0}).forEach((seed) => {
+      const n = nodes.getIds({filter: (x) => isSingletonOf(seed, x.id)}).length;
+      if (n < 2) return;
+      network.cluster({
+        joinCondition: (o) => isSingletonOf(seed, o.id),
+        clusterNodeProperties: {id: "singletons_" + seed, label: "+" + n + " singletons (" + seed + ")",
+                                shape: "dot", color: "#ccc", level: 1},
+      });
+    });
+  }
+
+  function show(obj){
+    document.getElementById("panel").textContent = JSON.stringify(obj, null, 2);
+  }
+
+  // interactor tooltips are built lazily on first hover instead of shipping HTML per node;
+  // only the top 30 get one, the rest are shown in the panel on click
+  function nodeTitle(info){
+    const el = document.createElement("div");
+    el.innerHTML =
+      "<b>" + info.id + "</b><br>" +
+      "kind: " + info.kind + "<br>" +
+      "coverage: " + info.coverage + "/" + info.seed_count + "<br>" +
+      "conf_mean: " + info.confidence_mean + "<br>" +
+      "db_support: " + info.db_support + "<br>" +
+      "hit_seeds: " + (info.hit_seeds || []).join(", ");
+    return el;
+  }
+
+  network.on("hoverNode", (params) => {
+    const id = params.node;
+    const info = nodeInfo[id];
+    if (!info || info.role !== "interactor" || info.rank > 30) return;
+    if (nodes.get(id).title === undefined) nodes.update({id, title: nodeTitle(info)});
+  });
+
+  network.on("click", (params) => {
+    if (params.nodes && params.nodes.length){
+      const id = params.nodes[0];
+      if (network.isCluster(id)) {
+        network.openCluster(id);
+        return;
+      }
+      show(nodeInfo[id] || {id});
+    } else if (params.edges && params.edges.length){
+      const id = params.edges[0];
+      show(edgeInfo[id] || edges.get(id) || {id});
+    }
+  });
+
+  document.getElementById("go").onclick = () => {
+    const q = (document.getElementById("q").value || "").trim();
+    if (!q) return;
+    const n = nodes.get(q);
+    if (!n){
+      alert("Node not found: " + q);
+      return;
+    }
+    const path = network.findNode(q);
+    if (path.length > 1) network.openCluster(path[0]);
+    network.selectNodes([q]);
+    network.focus(q, {scale: 1.2, animation: true});
+    show(nodeInfo[q] || {id: q});
+  };
+</script>
+</body>
+</html>
+"""
+
 @app.get("/viz/regulon3", response_class=HTMLResponse)
 def viz_regulon_v3(
     mode: str = Query("majority"),
     min_coverage: Optional[int] = Query(None, ge=1),
     top: int = Query(30, ge=5, le=200),
     labels: str = Query("top"),  # top|all|none
+    cluster: Optional[int] = Query(None, ge=0, le=1),  # 1|0; default: on when top > 50
+    details: int = Query(0, ge=0, le=1),  # 1: ship per-edge edgeInfo for the side panel
     p: Dict[str, Any] = Depends(network_params),
 ):
     import json as _json
@@ -2254,65 +2386,69 @@ def viz_regulon_v3(
     if not inter:
         return HTMLResponse("<h3>No shared interactors under current thresholds</h3><p>Try mode=any or lower min_coverage.</p>")
 
-    seedset = set(seeds)
-    interset = set(inter)
+    interset = frozenset(inter)
 
     node_kind = {n.get("id"): (n.get("kind") or "unknown") for n in netw.get("nodes", []) if n.get("id")}
     metrics = {x["node"]: x for x in items}
 
     # 1) aggregate edges per (seed, interactor) => remove spaghetti (parallel edges)
+    # hot loop: lookups resolved once, per-edge work kept to local names
+    edge_weight = _reg_edge_weight_v1 if "_reg_edge_weight_v1" in globals() else (lambda _e: 0.5)
+    in_inter = interset.__contains__
     agg = {}
-    for e in netw.get("edges", []):
-        u = e.get("source"); v = e.get("target")
-        if not u or not v:
-            continue
-
-        if u in seedset and v in interset:
-            s, t = u, v
-        elif v in seedset and u in interset:
-            s, t = v, u
-        else:
-            continue
-
-        key = (s, t)
-        w = float(_reg_edge_weight_v1(e)) if "_reg_edge_weight_v1" in globals() else 0.5
-
-        a = agg.get(key)
-        if a is None:
-            a = {"best_w": w, "dbs": set(), "kinds": set(), "support": 0, "best_score": None}
-            agg[key] = a
-
-        a["best_w"] = max(a["best_w"], w)
-        if e.get("source_db"):
-            a["dbs"].add(str(e.get("source_db")))
-        if e.get("kind"):
-            a["kinds"].add(str(e.get("kind")))
-
-        try:
-            a["support"] += int(e.get("support") or 1)
-        except Exception:
-            a["support"] += 1
-
-        sc = e.get("score")
-        if sc is not None:
-            try:
-                f = float(sc)
-                if (a["best_score"] is None) or (f > a["best_score"]):
-                    a["best_score"] = f
-            except Exception:
-                pass
+    agg_get = agg.get
+    # walk only the seeds' edges via the endpoint index (seeds and interactors are disjoint)
+    all_edges = netw.get("edges", [])
+    idx = _edge_index_v1(netw)
+    for s in dict.fromkeys(seeds):
+        for ei in idx.get(s, ()):
+            e = all_edges[ei]
+            e_get = e.get
+            u = e_get("source"); v = e_get("target")
+            t = v if u == s else u
+            if not in_inter(t):
+                continue
+            key = (s, t)
+
+            # _reg_edge_weight_v1 is clamped to <= 1.0: once a pair hits it, skip weighing more edges
+            a = agg_get(key)
+            if a is None:
+                a = {"best_w": float(edge_weight(e)), "dbs": set(), "kinds": set(), "support": 0, "best_score": None}
+                agg[key] = a
+            elif a["best_w"] < 1.0:
+                w = float(edge_weight(e))
+                if w > a["best_w"]:
+                    a["best_w"] = w
+
+            sdb = e_get("source_db")
+            if sdb:
+                a["dbs"].add(str(sdb))
+            kind = e_get("kind")
+            if kind:
+                a["kinds"].add(str(kind))
+
+            # build_network already types these (Edge.support: int, Edge.score: float|None)
+            sup = e_get("support")
+            a["support"] += sup if isinstance(sup, int) else 1
+
+            sc = e_get("score")
+            if isinstance(sc, (int, float)):
+                best_score = a["best_score"]
+                if (best_score is None) or (sc > best_score):
+                    a["best_score"] = float(sc)
 
     # label policy (avoid clutter)
     labels = (labels or "top").lower()
     if labels not in ("top", "all", "none"):
         labels = "top"
 
-    def _lab(i: int, name: str) -> str:
-        if labels == "all":
-            return name
-        if labels == "none":
-            return ""
-        return name if i < 12 else ""  # top 12 labels only
+    # resolve the policy once into a per-interactor label list
+    if labels == "all":
+        inter_labels = list(inter)
+    elif labels == "none":
+        inter_labels = [""] * len(inter)
+    else:
+        inter_labels = [x if i < 12 else "" for i, x in enumerate(inter)]  # top 12 labels only
 
     # 2) build nodes + info
     nodes = []
@@ -2326,7 +2462,9 @@ def viz_regulon_v3(
         node_info[s] = {"id": s, "role": "seed", "kind": k}
 
     # interactors (level 1)
-    for i, x in enumerate(inter):
+    # tooltip HTML is built client-side on hover from node_info (see hoverNode handler)
+    seed_count = reg.get("seed_count", len(seeds))
+    for i, (x, lab) in enumerate(zip(inter, inter_labels)):
         k = (node_kind.get(x, "unknown") or "unknown").lower()
         grp = k if k in ("rna","protein") else "unknown"
         m = metrics.get(x, {})
@@ -2334,30 +2472,21 @@ def viz_regulon_v3(
         node_info[x] = {
             "id": x,
             "role": "interactor",
+            "rank": i + 1,
             "kind": k,
             "coverage": m.get("coverage"),
-            "seed_count": reg.get("seed_count", len(seeds)),
+            "seed_count": seed_count,
             "confidence_mean": m.get("confidence_mean"),
             "db_support": m.get("db_support"),
             "degree": m.get("degree"),
             "hit_seeds": m.get("hit_seeds", []),
         }
 
-        title = (
-            f"<b>{x}</b><br>"
-            f"kind: {k}<br>"
-            f"coverage: {m.get('coverage')}/{reg.get('seed_count', len(seeds))}<br>"
-            f"conf_mean: {m.get('confidence_mean')}<br>"
-            f"db_support: {m.get('db_support')}<br>"
-            f"hit_seeds: {', '.join(m.get('hit_seeds', []))}"
-        )
-
         nodes.append({
             "id": x,
-            "label": _lab(i, x),
+            "label": lab,
             "group": grp,
             "level": 1,
-            "title": title,
         })
 
     # 3) build edges + info
@@ -2386,29 +2515,30 @@ def viz_regulon_v3(
             "arrows": "to",
         })
 
-        edge_info[eid] = {
-            "id": eid,
-            "from": s,
-            "to": t,
-            "db": dbs,
-            "kinds": kds,
-            "support_sum": a["support"],
-            "best_w": a["best_w"],
-            "best_score": a["best_score"],
-        }
+        # edge title already carries the same fields; only duplicate them on request
+        if details:
+            edge_info[eid] = {
+                "id": eid,
+                "from": s,
+                "to": t,
+                "db": dbs,
+                "kinds": kds,
+                "support_sum": a["support"],
+                "best_w": a["best_w"],
+                "best_score": a["best_score"],
+            }
         j += 1
 
-    nodes_json = _json.dumps(nodes, ensure_ascii=False)
-    edges_json = _json.dumps(edges, ensure_ascii=False)
-    nodeinfo_json = _json.dumps(node_info, ensure_ascii=False)
-    edgeinfo_json = _json.dumps(edge_info, ensure_ascii=False)
-
+    # large views: drop hover/nav/keyboard handlers and hide edges while dragging/zooming
+    small_view = top < 80
     options = {
-        "layout": {"hierarchical": {"enabled": True, "direction": "LR", "sortMethod": "directed",
+        "layout": {"improvedLayout": top < 100,
+                   "hierarchical": {"enabled": True, "direction": "LR", "sortMethod": "directed",
                                     "levelSeparation": 260, "nodeSpacing": 180, "treeSpacing": 220}},
         "physics": {"enabled": False},
         "edges": {"smooth": False, "arrows": {"to": {"enabled": True, "scaleFactor": 0.6}}},
-        "interaction": {"hover": True, "tooltipDelay": 80, "navigationButtons": True, "keyboard": True},
+        "interaction": {"hover": small_view, "tooltipDelay": 200, "navigationButtons": small_view, "keyboard": small_view,
+                        "hideEdgesOnDrag": True, "hideEdgesOnZoom": True},
         "nodes": {"font": {"size": 16}},
         "groups": {
             "seed_protein": {"shape": "box"},
@@ -2419,91 +2549,26 @@ def viz_regulon_v3(
             "unknown": {"shape": "dot"},
         }
     }
-    options_json = _json.dumps(options, ensure_ascii=False)
-
-    tpl = r"""
-<!doctype html>
-<html>
-<head>
-  <meta charset="utf-8">
-  <title>Regulon network (pro)</title>
-  <script src="https://unpkg.com/vis-network/standalone/umd/vis-network.min.js"></script>
-  <style>
-    body{font-family:Segoe UI,Arial;padding:18px}
-    #wrap{display:flex;gap:12px}
-    #net{flex:3;height:780px;border:1px solid #eee;border-radius:10px}
-    #panel{flex:1;height:780px;border:1px solid #eee;border-radius:10px;padding:10px;overflow:auto;
-           white-space:pre-wrap;font-family:Consolas,monospace;font-size:12px}
-    .muted{color:#666;font-size:13px;margin-top:6px}
-    .row{display:flex;gap:10px;align-items:center;flex-wrap:wrap;margin-top:10px}
-    input{padding:6px 8px;min-width:240px}
-    button{padding:6px 10px;cursor:pointer}
-  </style>
-</head>
-<body>
-  <h2>Regulon network</h2>
-  <div class="muted">
-    Clean bipartite view (seeds → shared interactors). Parallel edges are merged. Click node/edge for details.
-  </div>
-
-  <div class="row">
-    <b>Find node:</b>
-    <input id="q" placeholder="e.g. TP53, BRCA1, MALAT1">
-    <button id="go">Go</button>
-    <span class="muted">labels: __LABELS__ (use &labels=all|top|none)</span>
-  </div>
-
-  <div id="wrap">
-    <div id="net"></div>
-    <div id="panel">Click a node/edge to view details here.</div>
-  </div>
-
-<script>
-  const nodes = new vis.DataSet(__NODES__);
-  const edges = new vis.DataSet(__EDGES__);
-  const nodeInfo = __NODEINFO__;
-  const edgeInfo = __EDGEINFO__;
-  const options = __OPTIONS__;
-
-  const container = document.getElementById("net");
-  const network = new vis.Network(container, {nodes, edges}, options);
-
-  function show(obj){
-    document.getElementById("panel").textContent = JSON.stringify(obj, null, 2);
-  }
-
-  network.on("click", (params) => {
-    if (params.nodes && params.nodes.length){
-      const id = params.nodes[0];
-      show(nodeInfo[id] || {id});
-    } else if (params.edges && params.edges.length){
-      const id = params.edges[0];
-      show(edgeInfo[id] || {id});
-    }
-  });
-
-  document.getElementById("go").onclick = () => {
-    const q = (document.getElementById("q").value || "").trim();
-    if (!q) return;
-    const n = nodes.get(q);
-    if (!n){
-      alert("Node not found: " + q);
-      return;
-    }
-    network.selectNodes([q]);
-    network.focus(q, {scale: 1.2, animation: true});
-    show(nodeInfo[q] || {id: q});
-  };
-</script>
-</body>
-</html>
-"""
-    html = (tpl.replace("__NODES__", nodes_json)
-               .replace("__EDGES__", edges_json)
-               .replace("__NODEINFO__", nodeinfo_json)
-               .replace("__EDGEINFO__", edgeinfo_json)
-               .replace("__OPTIONS__", options_json)
-               .replace("__LABELS__", labels))
-    return HTMLResponse(html)
-
-
+    # collapse coverage=1 interactors into one expandable cluster per seed for big views
+    cluster_singletons = (top > 50) if cluster is None else bool(cluster)
+
+    # write the page as static head + JSON blocks + static tail instead of replace()-ing a full template;
+    # the graph is already built above and GZipMiddleware buffers small chunks, so this saves the
+    # whole-document copies, not time to first byte
+    def _chunks():
+        yield _REGULON3_TPL_PREFIX.replace("__LABELS__", labels)
+        yield _json.dumps(nodes, ensure_ascii=False)
+        yield ");\n  const edges = new vis.DataSet("
+        yield _json.dumps(edges, ensure_ascii=False)
+        yield ");\n  const nodeInfo = "
+        yield _json.dumps(node_info, ensure_ascii=False)
+        yield ";\n  const edgeInfo = "
+        yield _json.dumps(edge_info, ensure_ascii=False)
+        yield ";\n  const options = "
+        yield _json.dumps(options, ensure_ascii=False)
+        yield ";\n  const clusterSingletons = "
+        yield "true" if cluster_singletons else "false"
+        yield ";\n"
+        yield _REGULON3_TPL_SUFFIX
+
+    return StreamingResponse(_chunks(), media_type="text/html; charset=utf-8")
@@ -1,9 +1,19 @@
-﻿from fastapi import APIRouter
+﻿from fastapi import APIRouter, Request, Response
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import orjson
 import sqlite3
 import os
+import threading
 import traceback
+import zlib
 
-router = APIRouter()
+# 回應一律走 orjson (C 實作序列化)；即使 router 被掛到沒有設定 default_response_class 的 app 也一樣
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.get("/debug")
 async def system_check():
@@ -16,74 +26,335 @@ async def system_check():
     except Exception as e:
         return {"error": str(e)}
 
+def _resolve_db_path():
+    # REGULON_DB_PATH 可直接指定資料庫位置；否則自動適應 GCS 上的檔名大小寫，最後退回本機開發路徑
+    env_path = os.getenv("REGULON_DB_PATH")
+    if env_path:
+        return env_path
+    # 取消 RAM 複製，直接讀取隨身碟 (測試是否為記憶體不足導致 500)
+    if os.path.exists("/mnt/gcs/regulon.db"):
+        return "/mnt/gcs/regulon.db"
+    if os.path.exists("/mnt/gcs/Regulon.db"):
+        return "/mnt/gcs/Regulon.db"
+    return r"C:\Users\biobe\Desktop\API_Interactomes\regulon.db"
+
+# 資料庫只在重建時才會變動：ETag 綁定 DB 檔的 mtime/大小 + 查詢參數，重複查詢直接回 304
+CACHE_MAX_AGE = 86400
+
+def _etag_for(db_path, *parts):
+    st = os.stat(db_path)
+    key = "|".join([str(st.st_mtime_ns), str(st.st_size)] + [str(p) for p in parts])
+    return '"' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + '"'
+
+def _cache_headers(etag):
+    return {"ETag": etag, "Cache-Control": f"public, max-age={CACHE_MAX_AGE}"}
+
+def _etag_matches(request, etag):
+    inm = request.headers.get("if-none-match", "")
+    return etag in [t.strip() for t in inm.split(",")] or inm.strip() == "*"
+
+# IN 清單一律以單一 JSON 參數綁定 (json_each)：SQL 字串不隨清單長度改變，
+# sqlite3 的 statement cache 可以重複使用已準備好的查詢，省去每次重新 parse/plan
+IN_LIST = "(SELECT value FROM json_each(?))"
+
+def _mode_filter(mode, seed_list):
+    if mode not in ('RNA', 'Protein'):
+        return "", []
+    if seed_list:
+        return f" AND (type = ? OR target IN {IN_LIST})", [mode, json.dumps(seed_list)]
+    return " AND type = ?", [mode]
+
+# 每個 worker thread 保留唯讀連線：省去每次請求重新開檔、解析 schema，
+# SQLite 自身的 page cache 也能跨請求保留熱的 B-tree 頁面
+DB_CACHE_KIB = 262144  # 每條連線的 page cache (256MB)
+# 直接 mmap 雲端檔案，由 kernel page cache 只載入實際查到的頁面 (預設涵蓋整個 ~1.7GB regulon.db)
+DB_MMAP_SIZE = int(os.getenv("REGULON_MMAP_SIZE", str(2 * 1024 ** 3)))
+_local = threading.local()
+# patch_rbp.py 物化 top_edges 時每個 seed 保留的名次數 (需與 patch_rbp.TOP_K 一致)
+TOP_EDGES_K = 500
+
+def _network_templates(rank, has_top, dedup):
+    # /network 的 SQL 只有少數幾種組合，每條連線開啟時先組好：
+    # key = (依 type 過濾, 有 all_seeds, 走 top_edges)，值 = (seed 之間連線的 SQL, 其餘標靶依排名的 SQL)。
+    # 原本 ORDER BY CASE WHEN target IN (...) 會讓排序鍵變成計算值，只能整段排序；
+    # 拆成兩段各自 LIMIT：先取 seed 之間的連線，再用剩下的名額取其他標靶，兩段都走索引
+    base = "SELECT target, type, db FROM interactions WHERE seed = ?"
+    group_sql = ""
+    if dedup:
+        # SELECT 裡的 MAX() 讓 SQLite 取排名最高那一列的 type / db (bare column)
+        base = f"SELECT target, type, db, MAX({rank}) FROM interactions WHERE seed = ?"
+        group_sql, rank = " GROUP BY target", f"MAX({rank})"
+    seeded = base + f" AND target IN {IN_LIST}{group_sql} ORDER BY {rank} DESC LIMIT ?"
+    templates = {}
+    for typed in (False, True):
+        type_sql = " AND type = ?" if typed else ""
+        for use_top in ((False, True) if has_top else (False,)):
+            if use_top:
+                ranked, order_by = "SELECT target, type, db FROM top_edges WHERE seed = ?", " ORDER BY type_rn" if typed else " ORDER BY rn"
+            else:
+                ranked, order_by = base, f"{group_sql} ORDER BY {rank} DESC"
+            templates[(typed, False, use_top)] = (None, f"{ranked}{type_sql}{order_by} LIMIT ?")
+            templates[(typed, True, use_top)] = (seeded, f"{ranked} AND target NOT IN {IN_LIST}{type_sql}{order_by} LIMIT ?")
+    return templates
+
+def _has_unique_pair(conn):
+    # WITHOUT ROWID 的 PRIMARY KEY 也會以 origin='pk' 的唯一索引出現在 index_list
+    for _, name, unique, *_ in conn.execute("PRAGMA index_list(interactions)"):
+        if unique and {r[2] for r in conn.execute(f"PRAGMA index_info('{name}')")} == {"seed", "target"}:
+            return True
+    return False
+
+# 啟動時請 kernel 對主資料庫非同步預讀一次 (POSIX_FADV_WILLNEED)，冷啟動的索引掃描不必逐頁等 I/O。
+# 由 app/main.py 的 lifespan 呼叫 start_prefetch，只做主資料庫、在背景 thread 執行，請求不會卡在預讀上。
+# Windows 沒有 posix_fadvise，REGULON_PREFETCH=0 可關閉
+DB_PREFETCH = os.getenv("REGULON_PREFETCH", "1") != "0"
+
+def _prefetch_db(db_path):
+    try:
+        fd = os.open(db_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+def start_prefetch():
+    db_path = _resolve_db_path()
+    if DB_PREFETCH and hasattr(os, "posix_fadvise") and os.path.exists(db_path):
+        threading.Thread(target=_prefetch_db, args=(db_path,), name="regulon-prefetch", daemon=True).start()
+
+def _get_conn(db_path):
+    # 每條 thread 依檔案路徑各保留一條連線 (主資料庫 + 用到的分片)；
+    # 取用時把該連線的排名欄位、SQL 模板等設定切到 _local 上。
+    # 檔案被重建/替換 (inode、mtime 或大小改變) 時關掉舊連線重開，不會繼續讀到舊 inode 的資料
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    st = os.stat(db_path)
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    entry = conns.get(db_path)
+    if entry is not None and entry[0] != stamp:
+        entry[1].close()
+        entry = None
+    if entry is None:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        conn.execute("PRAGMA query_only=1")
+        conn.execute(f"PRAGMA cache_size=-{DB_CACHE_KIB}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+        # 新版資料庫有預先算好的 db_count 欄位 (可走 idx_seed_dbcount)；舊檔退回每列計算逗號數
+        cols = [r[1] for r in conn.execute("PRAGMA table_info(interactions)")]
+        rank = "db_count" if "db_count" in cols else "length(db) - length(replace(db, ',', ''))"
+        # 舊檔若沒有 (seed, target) 唯一鍵，同一標靶可能重複出現：改在 SQL 內 GROUP BY 去重後再 LIMIT，
+        # 回傳筆數才會與 limit 一致 (此時 top_edges 也可能含重複，不使用)
+        dedup = not _has_unique_pair(conn)
+        top_edges = not dedup and conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'top_edges'").fetchone() is not None
+        entry = conns[db_path] = (stamp, conn, rank, dedup, top_edges, _network_templates(rank, top_edges, dedup))
+    _, conn, _local.rank, _local.dedup, _local.top_edges, _local.templates = entry
+    return conn
+
+# shard_db.py 依 crc32(seed) % shard_count 把 interactions 切成 regulon_shards/regulon_XX.db：
+# 單一 seed 的查詢只碰一個小檔，B-tree 較淺、索引頁也容易整份留在 cache。
+# manifest 記錄的來源 mtime/大小與目前 regulon.db 不符 (已重建) 時不使用分片
+_shard_manifests = {}
+
+def _shard_dir(db_path):
+    return os.getenv("REGULON_SHARD_DIR") or os.path.join(os.path.dirname(db_path), "regulon_shards")
+
+def _shard_count(db_path):
+    st = os.stat(db_path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _shard_manifests.get(db_path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    count = 0
+    try:
+        with open(os.path.join(_shard_dir(db_path), "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if (manifest["source_mtime_ns"], manifest["source_size"]) == stamp:
+            count = int(manifest["shard_count"])
+    except (OSError, ValueError, KeyError):
+        pass
+    _shard_manifests[db_path] = (stamp, count)
+    return count
+
+def _shard_for(db_path, seed):
+    count = _shard_count(db_path)
+    if not count:
+        return db_path
+    return os.path.join(_shard_dir(db_path), f"regulon_{zlib.crc32(seed.encode('utf-8')) % count:02d}.db")
+
+# 專用的查詢執行緒池 = 連線池：每條 thread 各持一條連線，池的大小就是連線數上限。
+# 不借用 asyncio.to_thread 的預設 executor (最多 cpu+4 條 thread，每條都帶 256MB cache)
+DB_POOL_SIZE = int(os.getenv("REGULON_DB_POOL", "4"))
+_db_pool = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="regulon-db")
+
+async def _run_db(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_db_pool, fn, *args)
+
+def _split_db(db):
+    # db 欄位是 GROUP_CONCAT 出來的逗號字串；直接回傳陣列，前端不必逐條 split
+    return [d.strip() for d in db.split(',') if d.strip()] if db else []
+
+def _query_network(db_path, seed, mode, seed_list, limit):
+    # 同步 SQLite 查詢；endpoint 透過 _run_db 丟到查詢執行緒池，避免阻塞 event loop
+    c = _get_conn(_shard_for(db_path, seed)).cursor()
+    try:
+        typed = mode in ('RNA', 'Protein')
+        # top_edges 存有每個 seed 的前 TOP_EDGES_K 名；扣掉 seed 之間的連線後名額仍保證足夠時才使用
+        use_top = _local.top_edges and 0 <= limit <= TOP_EDGES_K - len(set(seed_list))
+        seeded_sql, ranked_sql = _local.templates[(typed, bool(seed_list), use_top)]
+        type_params = (mode,) if typed else ()
+        # (seed, target) 是主鍵，同一個 seed 下 target 不會重複：直接逐列讀 cursor，
+        # 不再 fetchall 整批複製一份，也不需要 Python 端的 seen set。
+        # 每列只存 (target, mol_type, database) tuple，JSON 物件留到 _network_payload 一次編碼
+        results = []
+
+        def collect(rows):
+            for target, mol_type, db, *_ in rows:
+                results.append((target, mol_type, _split_db(db)))
+
+        if seed_list:
+            seeds_json = json.dumps(seed_list)
+            collect(c.execute(seeded_sql, (seed, seeds_json, limit)))
+            if len(results) != limit:
+                collect(c.execute(ranked_sql, (seed, seeds_json, *type_params, limit - len(results))))
+        else:
+            collect(c.execute(ranked_sql, (seed, *type_params, limit)))
+        return results
+    finally:
+        c.close()
+
+def _ranked_per_seed_sql(seed_order, mode, seed_list, limit):
+    # batch 與 rollup 共用的子查詢：每個 seed 各自排名 (seed 之間的連線優先，其次依資料庫數)，只留前 limit 名。
+    # 回傳 (sql, params)，欄位為 seed, target, type, db, rn；須在 _get_conn 之後呼叫 (排名欄位取自 _local)
+    mode_sql, mode_params = _mode_filter(mode, seed_list)
+    params = []
+
+    # 參數依 SQL 字面順序綁定：OVER (ORDER BY ...) 在 WHERE 之前
+    rank = f"MAX({_local.rank})" if _local.dedup else _local.rank
+    best_sql, group_sql = (f", {rank} AS best", " GROUP BY seed, target") if _local.dedup else ("", "")
+    rank_key = f"{rank} DESC"
+    if seed_list:
+        rank_key = f"CASE WHEN target IN {IN_LIST} THEN 1 ELSE 0 END DESC, " + rank_key
+        params.append(json.dumps(seed_list))
+    params += [json.dumps(seed_order), *mode_params, limit]
+
+    sql = (
+        "SELECT seed, target, type, db, rn FROM ("
+        f"SELECT seed, target, type, db{best_sql}, ROW_NUMBER() OVER (PARTITION BY seed ORDER BY {rank_key}) AS rn"
+        f" FROM interactions WHERE seed IN {IN_LIST}{mode_sql}{group_sql}"
+        ") WHERE rn <= ?"
+    )
+    return sql, params
+
+def _query_network_batch(db_path, seed_order, mode, seed_list, limit):
+    c = _get_conn(db_path).cursor()
+    try:
+        ranked_sql, params = _ranked_per_seed_sql(seed_order, mode, seed_list, limit)
+        c.execute(f"SELECT seed, target, type, db FROM ({ranked_sql}) ORDER BY seed, rn", params)
+
+        results = {s: [] for s in seed_order}
+        for seed, target, mol_type, db in c:
+            results[seed].append({"target": target, "mol_type": mol_type, "database": _split_db(db)})
+        return results
+    finally:
+        c.close()
+
+def _query_network_rollup(db_path, seed_order, mode, seed_list, limit):
+    # 與 batch 相同的每個 seed 前 limit 條，再於 SQLite 內 GROUP BY target 彙整，前端不必自己累加
+    c = _get_conn(db_path).cursor()
+    try:
+        ranked_sql, params = _ranked_per_seed_sql(seed_order, mode, seed_list, limit)
+        c.execute(
+            "SELECT target, COUNT(DISTINCT seed) AS hits, GROUP_CONCAT(DISTINCT seed) AS seeds,"
+            " GROUP_CONCAT(DISTINCT db) AS dbs, MAX(type) AS type"
+            f" FROM ({ranked_sql}) WHERE target != seed GROUP BY target ORDER BY hits DESC, target",
+            params)
+
+        results = []
+        for target, hits, seeds, dbs, mol_type in c:
+            # db 欄位本身就是逗號串接，GROUP_CONCAT 後再拆開去重
+            databases = sorted({d.strip() for d in (dbs or '').split(',') if d.strip()})
+            results.append({"target": target, "mol_type": mol_type, "hits": hits,
+                            "seeds": seeds.split(','), "databases": databases})
+        return results
+    finally:
+        c.close()
+
+# /network 結果的行程內 LRU：熱門 seed 重複查詢直接回傳，不必再進 SQLite。
+# key 含 DB 檔的 mtime/大小，資料庫重建後舊項目自然不再命中
+NETWORK_CACHE_SIZE = 4096
+_network_cache = OrderedDict()
+
+def _network_cache_key(db_path, seed, mode, seed_list, limit):
+    st = os.stat(db_path)
+    # seed_list 只用在 IN 條件，順序不影響結果
+    return (db_path, st.st_mtime_ns, st.st_size, seed, mode, tuple(sorted(seed_list)), limit)
+
+def _network_cache_get(key):
+    results = _network_cache.get(key)
+    if results is not None:
+        _network_cache.move_to_end(key)
+    return results
+
+def _network_cache_put(key, results):
+    _network_cache[key] = results
+    if len(_network_cache) > NETWORK_CACHE_SIZE:
+        _network_cache.popitem(last=False)
+
+def _edge(row):
+    target, mol_type, database = row
+    return {"target": target, "mol_type": mol_type, "database": database}
+
+def _network_payload(db_path, seed, mode, seed_list, limit):
+    # 在查詢執行緒內一併把 edges 陣列編成 JSON bytes：LRU 命中時直接拼接回應，不必重新序列化
+    rows = tuple(_query_network(db_path, seed, mode, seed_list, limit))
+    return rows, orjson.dumps([_edge(r) for r in rows])
+
+NDJSON_CHUNK = 500
+
+async def _ndjson_lines(rows):
+    # 每行一個 edge (NDJSON)，分批送出讓前端邊收邊解析；async generator 不會被丟進 threadpool
+    for i in range(0, len(rows), NDJSON_CHUNK):
+        yield b"".join(orjson.dumps(_edge(r)) + b"\n" for r in rows[i:i + NDJSON_CHUNK])
+
 @router.get("/network")
-async def get_targeted_network(seed: str, mode: str = 'All', all_seeds: str = '', limit: int = 500):
+async def get_targeted_network(request: Request, seed: str, mode: str = 'All', all_seeds: str = '', limit: int = 500, format: str = 'json'):
     try:
         error_msg = "No error"
-        
-        # 取消 RAM 複製，直接讀取隨身碟 (測試是否為記憶體不足導致 500)
-        gcs_db_path = None
-        if os.path.exists("/mnt/gcs/regulon.db"):
-            gcs_db_path = "/mnt/gcs/regulon.db"
-        elif os.path.exists("/mnt/gcs/Regulon.db"):
-            gcs_db_path = "/mnt/gcs/Regulon.db"
-            
-        if gcs_db_path:
-            db_path_to_use = gcs_db_path
-        else:
-            db_path_to_use = r"C:\Users\biobe\Desktop\API_Interactomes\regulon.db"
+        db_path_to_use = _resolve_db_path()
 
         seed = seed.upper()
         seed_list = [s.strip().upper() for s in all_seeds.split(',')] if all_seeds else []
-        results = []
-        seen = set()
+        rows, edges_json = (), b"[]"
+        headers = {}
 
         if os.path.exists(db_path_to_use):
-            # 採用最單純的連線方式，且加上唯讀模式避免鎖定檔案
-            db_uri = f"file:{db_path_to_use}?mode=ro"
-            conn = sqlite3.connect(db_uri, uri=True)
-            c = conn.cursor()
-            
-            query_base = "SELECT target, type, db FROM interactions WHERE seed = ?"
-            params = [seed]
-            
-            if mode == 'RNA':
-                if seed_list:
-                    placeholders = ','.join(['?'] * len(seed_list))
-                    query_base += f" AND (type = 'RNA' OR target IN ({placeholders}))"
-                    params.extend(seed_list)
-                else:
-                    query_base += " AND type = 'RNA'"
-            elif mode == 'Protein':
-                if seed_list:
-                    placeholders = ','.join(['?'] * len(seed_list))
-                    query_base += f" AND (type = 'Protein' OR target IN ({placeholders}))"
-                    params.extend(seed_list)
-                else:
-                    query_base += " AND type = 'Protein'"
-                    
-            if seed_list:
-                placeholders = ','.join(['?'] * len(seed_list))
-                order_clause = f" ORDER BY CASE WHEN target IN ({placeholders}) THEN 1 ELSE 0 END DESC, length(db) - length(replace(db, ',', '')) DESC LIMIT ?"
-                params.extend(seed_list)
-                params.append(limit)
-                query_base += order_clause
-            else:
-                query_base += " ORDER BY length(db) - length(replace(db, ',', '')) DESC LIMIT ?"
-                params.append(limit)
-            
-            c.execute(query_base, tuple(params))
-            
-            for row in c.fetchall():
-                t = row[0]
-                if t not in seen:
-                    results.append({"target": t, "mol_type": row[1], "database": row[2]})
-                    seen.add(t)
-            conn.close()
+            headers = _cache_headers(_etag_for(db_path_to_use, "network", seed, mode, ','.join(seed_list), limit, format))
+            if _etag_matches(request, headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+            cache_key = _network_cache_key(db_path_to_use, seed, mode, seed_list, limit)
+            cached = _network_cache_get(cache_key)
+            if cached is None:
+                cached = await _run_db(_network_payload, db_path_to_use, seed, mode, seed_list, limit)
+                _network_cache_put(cache_key, cached)
+            rows, edges_json = cached
         else:
             error_msg = "DB file not found at path"
 
-        return {"seed": seed, "edges": results, "debug_status": error_msg, "db_used": db_path_to_use}
+        if format == 'ndjson':
+            # 每一行都是 edge，沒有外層物件：debug_status 改放在 X-Debug-Status header，db_used 不回傳。
+            # app/main.py 的 GZipMiddleware 排除了 application/x-ndjson，各批次會立即送出
+            return StreamingResponse(_ndjson_lines(rows), media_type="application/x-ndjson",
+                                     headers={"X-Debug-Status": error_msg, **headers})
+
+        # edges 已是編好的 JSON bytes，外層只剩三個純量欄位，直接拼成回應本體
+        body = b"".join((b'{"seed":', orjson.dumps(seed), b',"edges":', edges_json,
+                         b',"debug_status":', orjson.dumps(error_msg), b',"db_used":', orjson.dumps(db_path_to_use), b'}'))
+        return Response(content=body, media_type="application/json", headers=headers)
         
     except Exception as e:
         # 這是防止 HTTP 500 的終極護城河，把所有崩潰原因印在網頁上
@@ -94,3 +365,76 @@ async def get_targeted_network(seed: str, mode: str = 'All', all_seeds: str = ''
             "error_detail": str(e),
             "traceback": traceback.format_exc()
         }
+
+
+def _parse_seeds(seeds, all_seeds):
+    # seeds 依出現順序去重 (決定回傳順序)；all_seeds 只用於 IN 條件
+    seed_order = []
+    for s in seeds.split(','):
+        s = s.strip().upper()
+        if s and s not in seed_order:
+            seed_order.append(s)
+    seed_list = [s.strip().upper() for s in all_seeds.split(',')] if all_seeds else []
+    return seed_order, seed_list
+
+async def _multi_seed_response(request, response, kind, key, empty, query_fn, seeds, mode, all_seeds, limit):
+    # batch / rollup 共用的流程：解析 seed、ETag/304、丟到查詢執行緒池；
+    # 結果放在 key 欄位，empty(seed_order) 產生查無資料 (或崩潰) 時的空結果
+    seed_order = []
+    try:
+        error_msg = "No error"
+        db_path_to_use = _resolve_db_path()
+        seed_order, seed_list = _parse_seeds(seeds, all_seeds)
+        results = empty(seed_order)
+
+        if not seed_order:
+            error_msg = "No seeds given"
+        elif os.path.exists(db_path_to_use):
+            headers = _cache_headers(_etag_for(db_path_to_use, kind, ','.join(seed_order), mode, ','.join(seed_list), limit))
+            if _etag_matches(request, headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+            results = await _run_db(query_fn, db_path_to_use, seed_order, mode, seed_list, limit)
+            response.headers.update(headers)
+        else:
+            error_msg = "DB file not found at path"
+
+        return {"seeds": seed_order, key: results, "debug_status": error_msg, "db_used": db_path_to_use}
+
+    except Exception as e:
+        return {
+            "seeds": seed_order,
+            key: empty([]),
+            "debug_status": "CRASH_PREVENTED",
+            "error_detail": str(e),
+            "traceback": traceback.format_exc()
+        }
+
+
+@router.get("/network/batch")
+async def get_targeted_network_batch(request: Request, response: Response, seeds: str, mode: str = 'All', all_seeds: str = '', limit: int = 500):
+    # 一次查詢多個 seed：單一 SQL (seed IN (...)) 取代 N 次 /network 呼叫，每個 seed 各自排序並套用 limit
+    return await _multi_seed_response(request, response, "batch", "results", lambda order: {s: [] for s in order},
+                                      _query_network_batch, seeds, mode, all_seeds, limit)
+
+
+@router.get("/network/rollup")
+async def get_network_rollup(request: Request, response: Response, seeds: str, mode: str = 'All', all_seeds: str = '', limit: int = 500):
+    # 以 target 為單位的彙整結果：hits = 命中的 seed 數，seeds / databases 皆已去重
+    return await _multi_seed_response(request, response, "rollup", "targets", lambda order: [],
+                                      _query_network_rollup, seeds, mode, all_seeds, limit)
+
+
+# 可整份下載給瀏覽器的資料庫大小上限 (需與 viz_pro.py 的 LOCAL_DB_MAX_BYTES 一致)；
+# 在伺服器端把關，完整的 1.7 GB 人類交互作用庫不會被任何 GET 直接整份拉走
+LOCAL_DB_MAX_BYTES = int(os.getenv("REGULON_LOCAL_DB_MAX_BYTES", str(256 * 1024 * 1024)))
+
+@router.api_route("/regulon.db", methods=["GET", "HEAD"])
+async def download_regulon_db():
+    # 提供整個 SQLite 檔給前端 sql.js 在瀏覽器本地查詢；前端先用 HEAD 看大小，超過上限回 413 就沿用伺服器查詢
+    db_path_to_use = _resolve_db_path()
+    if not os.path.exists(db_path_to_use):
+        return Response(status_code=404)
+    if os.path.getsize(db_path_to_use) > LOCAL_DB_MAX_BYTES:
+        return Response(status_code=413)
+    return FileResponse(db_path_to_use, media_type="application/vnd.sqlite3",
+                        headers={"Cache-Control": f"public, max-age={CACHE_MAX_AGE}"})
@@ -7,7 +7,35 @@ router = APIRouter()
 async def get_paper_viz_ui():
     return """<!DOCTYPE html>
 <html><head><title>Regulon Pro - NAR Publication Mode</title>
-<script src="https://unpkg.com/vis-network/standalone/umd/vis-network.min.js"></script>
+<script src="https://cdn.jsdelivr.net/npm/graphology@0.25.4/dist/graphology.umd.min.js"></script>
+<script src="https://cdn.jsdelivr.net/npm/graphology-library@0.8.0/dist/graphology-library.min.js"></script>
+<script id="fa2-worker-src" type="text/js-worker">
+// ForceAtlas2 背景執行緒：Barnes-Hut 近似 (O(N log N))，每 2 輪把座標以 Transferable 回傳主執行緒
+importScripts("https://cdn.jsdelivr.net/npm/graphology@0.25.4/dist/graphology.umd.min.js",
+              "https://cdn.jsdelivr.net/npm/graphology-library@0.8.0/dist/graphology-library.min.js");
+const spare = []; // 主執行緒用完後送回的座標緩衝區，循環使用，不必每輪重新配置
+self.onmessage = function(ev) {
+    if(ev.data.recycle) { spare.push(ev.data.recycle); return; }
+    const { xy, edges, iterations } = ev.data;
+    const n = xy.length / 2;
+    const graph = new graphology.Graph();
+    for(let i = 0; i < n; i++) graph.addNode(i, { x: xy[2*i], y: xy[2*i+1] });
+    for(let k = 0; k < edges.length; k += 2) graph.mergeEdge(edges[k], edges[k+1]);
+    const fa2 = graphologyLibrary.layoutForceAtlas2;
+    const settings = Object.assign(fa2.inferSettings(graph), { barnesHutOptimize: true, barnesHutTheta: 0.5 });
+    let done = 0;
+    function tick() {
+        fa2.assign(graph, { iterations: 2, settings: settings });
+        done += 2;
+        const out = spare.pop() || new Float32Array(2 * n);
+        graph.forEachNode((key, attr) => { out[2*key] = attr.x; out[2*key+1] = attr.y; });
+        self.postMessage({ xy: out, done: done >= iterations }, [out.buffer]);
+        if(done < iterations) setTimeout(tick, 0);
+    }
+    tick();
+};
+</script>
+<script src="https://cdn.jsdelivr.net/npm/sigma@2.4.0/build/sigma.min.js"></script>
 <style>
 body { margin: 0; padding: 0; overflow: hidden; font-family: 'Helvetica Neue', Helvetica, Arial, sans-serif; background: #ffffff; color: #333; display: flex; height: 100vh; }
 #sidebar { width: 400px; min-width: 400px; height: 100vh; background: #f8f9fa; border-right: 1px solid #e5e7eb; padding: 25px; box-sizing: border-box; overflow-y: auto; z-index: 10; }
@@ -16,12 +44,17 @@ body { margin: 0; padding: 0; overflow: hidden; font-family: 'Helvetica Neue', H
 #mynetwork:active { cursor: grabbing; }
 
 /* 🚀 新增：資料表容器 (預設隱藏) */
-#table-container { display: none; flex-grow: 1; height: 100vh; background: #f3f4f6; padding: 30px; box-sizing: border-box; overflow-y: auto; }
+#table-container { display: none; flex-grow: 1; height: 100vh; background: #f3f4f6; padding: 30px; box-sizing: border-box; overflow-y: auto; position: relative; }
 .table-wrapper { background: #fff; border-radius: 12px; box-shadow: 0 4px 6px rgba(0,0,0,0.05); border: 1px solid #e5e7eb; overflow: hidden; }
 #regulonTable { width: 100%; border-collapse: collapse; text-align: left; font-size: 0.9rem; }
 #regulonTable th { background: #f8f9fa; padding: 15px; font-weight: 700; color: #4b5563; border-bottom: 2px solid #e5e7eb; position: sticky; top: 0; z-index: 5;}
 #regulonTable td { padding: 12px 15px; border-bottom: 1px solid #e5e7eb; vertical-align: middle; }
 #regulonTable tr:hover { background: #fef3c7; }
+/* 虛擬捲動：每列固定高度，內容超出時在格內捲動，才能用 scrollTop 直接換算列號 */
+#regulonTable tr.vrow { height: 64px; }
+#regulonTable tr.vrow td { padding: 6px 15px; }
+.cell-clip { max-height: 51px; overflow-y: auto; }
+#regulonTable tr.vspacer td { padding: 0; border: 0; }
 .progress-bg { width: 100px; background: #e5e7eb; border-radius: 4px; height: 8px; margin-top: 5px; overflow: hidden; }
 .progress-fill { height: 100%; background: #E64B35; }
 .seed-tag { display: inline-block; background: #fca5a5; color: #7f1d1d; padding: 2px 6px; border-radius: 4px; font-size: 0.75rem; margin: 2px; font-weight: bold;}
@@ -42,6 +75,7 @@ input[type="range"] { padding: 0; cursor: pointer; }
 button { width: 100%; padding: 10px; color: #fff; border: none; border-radius: 6px; font-weight: bold; cursor: pointer; margin-top: 5px; text-transform: uppercase; letter-spacing: 1px; }
 button:hover { opacity: 0.9; transform: translateY(-1px); }
 .btn-run { background: linear-gradient(135deg, #E64B35, #c0392b); }
+.btn-clear { background: #9ca3af; font-size: 0.75rem; padding: 6px; }
 .btn-view-toggle { background: #2563eb; }
 .btn-fit { background: #6b7280; flex:1;}
 .btn-export { background: #00A087; flex:1;}
@@ -64,17 +98,18 @@ button:hover { opacity: 0.9; transform: translateY(-1px); }
   <div class="grp"><label>4. Network Density</label><select id="density"><option value="1500">Scientific (Top 1500)</option><option value="4000">Deep Discovery (Top 4000)</option><option value="10000" selected>🔥 Extreme (Top 10000)</option></select></div>
   <div class="grp">
     <label>5. Min Overlap Hits (Max: <span id="maxHitDisplay" style="color:#E64B35;">? Validated</span>)</label>
-    <input type="range" id="minHits" min="1" max="4" value="2" oninput="document.getElementById('hitVal').innerText=this.value; if(window.hasData) { applyFilterAndRender(); buildTable(); }">
+    <input type="range" id="minHits" min="1" max="4" value="2" oninput="document.getElementById('hitVal').innerText=this.value; if(window.hasData) scheduleRender();">
     <div style="text-align:right; font-size:0.8rem; color:#666;">Current Set: <span id="hitVal" class="val-display" style="float:none;">2</span></div>
   </div>
-  <div class="grp"><label>6. Evidence Stringency</label><select id="stringency" onchange="if(window.hasData) { applyFilterAndRender(); buildTable(); }"><option value="any">Level 1: Any Database</option><option value="consensus">Level 2: Cross-DB Consensus</option></select></div>
+  <div class="grp"><label>6. Evidence Stringency</label><select id="stringency" onchange="if(window.hasData) scheduleRender();"><option value="any">Level 1: Any Database</option><option value="consensus">Level 2: Cross-DB Consensus</option></select></div>
   <button class="btn-run" onclick="fetchData()">🚀 Run Analysis</button>
+  <button class="btn-clear" onclick="clearNetCache()">🧹 Clear Cache</button>
   <div id="progress-container"><div id="progress-bar"></div></div>
   <div id="status">Ready.</div>
   
   <button id="btnToggle" class="btn-view-toggle" onclick="toggleView()" style="display:none; margin-top:15px;">🗂️ Switch to Data Table View</button>
   <div style="display:flex;gap:10px;margin-top:10px;">
-      <button class="btn-fit" onclick="if(net){net.fit();}">🔍 Fit View</button>
+      <button class="btn-fit" onclick="if(net){net.getCamera().animatedReset();}">🔍 Fit View</button>
       <button class="btn-export" onclick="exportCSV()">📊 Export CSV</button>
   </div>
 </div>
@@ -113,10 +148,25 @@ button:hover { opacity: 0.9; transform: translateY(-1px); }
 
 <script>
 var net=null; var rawEdges=[]; var nodeProps={}; var nodeDBs={}; var overlap={}; var currentSeeds=[]; window.hasData=false;
+var targetIndex = new Map(); // target -> { id, type, hits, boundSeeds, dbs, edges }，fetch 完成後一次建好
+var seedSet = new Set();
 var selectedNode = null; 
+var hoveredNode = null; // Sigma edgeReducer 用來高亮滑鼠所在節點的連線
 var actualValidatedSeeds = 0; // 全域變數供表格計算覆蓋率
 var currentView = 'network';
 
+// 拖曳滑桿時 input 事件每格都會觸發：合併到下一個動畫影格只重繪一次；
+// 表格只有在表格模式才需要重建 (切換過去時 toggleView 會再建一次)
+var renderFrame = 0;
+function scheduleRender() {
+    cancelAnimationFrame(renderFrame);
+    renderFrame = requestAnimationFrame(() => {
+        renderFrame = 0;
+        applyFilterAndRender();
+        if(currentView === 'table') buildTable();
+    });
+}
+
 function toggleView() {
     const netCont = document.getElementById('network-container');
     const tblCont = document.getElementById('table-container');
@@ -138,63 +188,176 @@ function toggleView() {
     }
 }
 
-// 🚀 核心：動態建立樞紐分析表
-function buildTable() {
-    if(!window.hasData) return;
-    const minHits = parseInt(document.getElementById('minHits').value);
-    const stringency = document.getElementById('stringency').value;
+// 🚀 虛擬捲動表格：只渲染視窗內 (加上 OVERSCAN) 的列，列節點由 template 複製後重複使用
+const ROW_H = 64, OVERSCAN = 8;
+var tableList = [];                  // targetIndex 的值，依插入順序
+var tableOrder = new Uint32Array(0); // 目前篩選/排序後要顯示的 tableList 索引
+var rowPool = [];
+var tableFramePending = false;
+const rowTpl = document.createElement('template');
+rowTpl.innerHTML = `<tr class="vrow">
+    <td class="c-rank" style="font-weight:bold; color:#6b7280;"></td>
+    <td><a class="c-link" target="_blank" style="color:#2563eb; font-weight:bold; text-decoration:none;"></a></td>
+    <td class="c-type"></td>
+    <td>
+        <div class="c-hits" style="font-weight:bold; color:#E64B35;"></div>
+        <div class="progress-bg"><div class="c-fill progress-fill"></div></div>
+    </td>
+    <td><div class="c-seeds cell-clip" style="max-width:250px; display:flex; flex-wrap:wrap;"></div></td>
+    <td><div class="c-dbs cell-clip" style="max-width:200px;"></div></td>
+</tr>`;
+
+function makeSpacer() {
+    const tr = document.createElement('tr'); tr.className = 'vspacer';
+    const td = document.createElement('td'); td.colSpan = 6; tr.appendChild(td);
+    return tr;
+}
+const spacerTop = makeSpacer(), spacerBottom = makeSpacer();
+
+// 徽章也用 cloneNode + textContent 產生，整列不經過 HTML parser (也順便避免 XSS)
+const seedTagProto = document.createElement('span');
+seedTagProto.className = 'seed-tag';
+const dbBadgeProto = document.createElement('span');
+dbBadgeProto.className = 'badge badge-db';
+dbBadgeProto.style.fontSize = '0.65rem';
+function fillTags(cell, items, proto) {
+    const frag = document.createDocumentFragment();
+    items.forEach(x => { const sp = proto.cloneNode(false); sp.textContent = x; frag.appendChild(sp); });
+    cell.replaceChildren(frag);
+}
+
+function fillRow(tr, t, index) {
+    if(tr._t === t) return; // 同一筆資料已經在這個節點上，不必重寫 DOM
+    tr._t = t;
+    let hitPercent = Math.round((t.hits / actualValidatedSeeds) * 100);
+    tr.querySelector('.c-rank').textContent = `#${index + 1}`;
+    const a = tr.querySelector('.c-link');
+    a.href = `https://www.ncbi.nlm.nih.gov/gene/?term=${t.id}`;
+    a.textContent = `${t.id} ↗`;
+    tr.querySelector('.c-type').textContent = t.type === 'RNA' ? '🧬 RNA' : '🔵 Protein';
+    tr.querySelector('.c-hits').textContent = `${t.hits} / ${actualValidatedSeeds} Seeds (${hitPercent}%)`;
+    tr.querySelector('.c-fill').style.width = `${hitPercent}%`;
+    fillTags(tr.querySelector('.c-seeds'), t.boundSeeds, seedTagProto);
+    fillTags(tr.querySelector('.c-dbs'), t.dbs, dbBadgeProto);
+}
+
+function renderTableWindow() {
+    tableFramePending = false;
+    if(tableOrder.length === 0) return;
+    const cont = document.getElementById('table-container');
+    const tbl = document.getElementById('regulonTable');
     const tbody = document.getElementById('tableBody');
-    tbody.innerHTML = '';
-    
-    // 整理每個 Target 的數據
-    let targetStats = {};
-    rawEdges.forEach(e => {
-        let dbSet = nodeDBs[e.to];
-        let isConsensus = dbSet && dbSet.size > 1;
-        if(stringency === 'consensus' && !isConsensus) return;
-        
-        // 我們只把「非 Seed 本身」的節點列入候選人分析 (除非你想看 Seed 互調控)
-        if(currentSeeds.includes(e.to)) return; 
+    // 第一列在捲動容器內的位置 = 表格 offsetTop + 表頭高度
+    const firstRowTop = tbl.offsetTop + tbl.tHead.offsetHeight;
+    const n = tableOrder.length;
+    let start = Math.floor((cont.scrollTop - firstRowTop) / ROW_H) - OVERSCAN;
+    start = Math.max(0, Math.min(start, n - 1));
+    const end = Math.min(n, start + Math.ceil(cont.clientHeight / ROW_H) + 2 * OVERSCAN);
 
-        if (!targetStats[e.to]) {
-            targetStats[e.to] = { id: e.to, type: nodeProps[e.to], hits: 0, boundSeeds: new Set(), dbs: new Set() };
-        }
-        if (!targetStats[e.to].boundSeeds.has(e.from)) {
-            targetStats[e.to].hits++;
-            targetStats[e.to].boundSeeds.add(e.from);
-        }
-        e.db.split(',').forEach(d => targetStats[e.to].dbs.add(d.trim()));
+    while(rowPool.length < end - start) rowPool.push(rowTpl.content.firstElementChild.cloneNode(true));
+    spacerTop.firstChild.style.height = (start * ROW_H) + 'px';
+    spacerBottom.firstChild.style.height = ((n - end) * ROW_H) + 'px';
+    // 先在 DocumentFragment 組好整個視窗，再一次換進 tbody：只觸發一次 layout
+    const frag = document.createDocumentFragment();
+    frag.appendChild(spacerTop);
+    for(let i = start; i < end; i++) {
+        const tr = rowPool[i - start];
+        fillRow(tr, tableList[tableOrder[i]], i);
+        frag.appendChild(tr);
+    }
+    frag.appendChild(spacerBottom);
+    tbody.replaceChildren(frag);
+}
+
+function scheduleTableWindow() {
+    if(tableFramePending) return;
+    tableFramePending = true;
+    requestAnimationFrame(renderTableWindow);
+}
+document.getElementById('table-container').addEventListener('scroll', scheduleTableWindow, { passive: true });
+window.addEventListener('resize', () => { if(currentView === 'table') scheduleTableWindow(); });
+
+// 篩選 + 排序只用整數陣列 (SoA)：hits / 資料庫數 / 是否為 seed，各自以 target 索引對齊。
+// 依 hits 做穩定的計數排序 (hits 上限就是 seed 數)，O(N) 且同分時保留原本順序。
+// 這個函式同時給 Web Worker 與主執行緒 (Worker 不可用時) 使用。
+function rankCandidates(hits, dbCount, isSeed, minHits, consensus) {
+    let maxHits = 0;
+    for(let i = 0; i < hits.length; i++) if(hits[i] > maxHits) maxHits = hits[i];
+    const bucketStart = new Uint32Array(maxHits + 2);
+    let total = 0;
+    for(let i = 0; i < hits.length; i++) {
+        if(isSeed[i] || hits[i] < minHits || (consensus && dbCount[i] <= 1)) continue;
+        bucketStart[maxHits - hits[i] + 1]++;
+        total++;
+    }
+    for(let b = 1; b < bucketStart.length; b++) bucketStart[b] += bucketStart[b - 1];
+    const order = new Uint32Array(total);
+    for(let i = 0; i < hits.length; i++) {
+        if(isSeed[i] || hits[i] < minHits || (consensus && dbCount[i] <= 1)) continue;
+        order[bucketStart[maxHits - hits[i]]++] = i;
+    }
+    return order;
+}
+
+// 🚀 表格的篩選排序交給 Web Worker：大量候選時網路圖的平移縮放不會被卡住
+var tableWorker = null;
+var tableSoA = null;
+var tableReqId = 0;
+function getTableWorker() {
+    if(tableWorker !== null) return tableWorker;
+    try {
+        const src = rankCandidates.toString() + `
+var soa = null;
+self.onmessage = function(ev) {
+    const m = ev.data;
+    if(m.type === 'load') { soa = m; return; }
+    const order = rankCandidates(soa.hits, soa.dbCount, soa.isSeed, m.minHits, m.consensus);
+    self.postMessage({ req: m.req, order: order }, [order.buffer]);
+};`;
+        tableWorker = new Worker(URL.createObjectURL(new Blob([src], { type: 'text/javascript' })));
+        tableWorker.onmessage = (ev) => { if(ev.data.req === tableReqId) showTableOrder(ev.data.order); };
+    } catch(err) {
+        tableWorker = false; // 不支援 Worker：退回主執行緒計算
+    }
+    return tableWorker;
+}
+
+// 每次新分析後把 targetIndex 轉成 SoA，只傳給 worker 一次
+function loadTableSoA() {
+    tableList = Array.from(targetIndex.values());
+    const n = tableList.length;
+    const hits = new Uint16Array(n), dbCount = new Uint8Array(n), isSeed = new Uint8Array(n);
+    tableList.forEach((t, i) => {
+        hits[i] = t.hits;
+        dbCount[i] = Math.min(255, t.dbs.size);
+        isSeed[i] = seedSet.has(t.id) ? 1 : 0;
     });
-    
-    // 過濾與排序 (依 Hits 降冪排列)
-    let candidates = Object.values(targetStats)
-        .filter(t => t.hits >= minHits)
-        .sort((a, b) => b.hits - a.hits);
-        
-    if(candidates.length === 0) {
-        tbody.innerHTML = '<tr><td colspan="6" style="text-align:center; padding:30px; color:#9ca3af;">No candidate regulons found under current filter settings.</td></tr>';
+    tableSoA = { hits, dbCount, isSeed };
+    const worker = getTableWorker();
+    if(worker) worker.postMessage({ type: 'load', hits, dbCount, isSeed });
+}
+
+function showTableOrder(order) {
+    tableOrder = order;
+    rowPool.forEach(tr => { tr._t = null; }); // 排名可能改變，強制重填
+    if(order.length === 0) {
+        document.getElementById('tableBody').innerHTML = '<tr><td colspan="6" style="text-align:center; padding:30px; color:#9ca3af;">No candidate regulons found under current filter settings.</td></tr>';
         return;
     }
-    
-    candidates.forEach((t, index) => {
-        let hitPercent = Math.round((t.hits / actualValidatedSeeds) * 100);
-        let seedsHtml = Array.from(t.boundSeeds).map(s => `<span class="seed-tag">${s}</span>`).join('');
-        let dbsHtml = Array.from(t.dbs).map(d => `<span class="badge badge-db" style="font-size:0.65rem;">${d}</span>`).join('');
-        let extLink = `https://www.ncbi.nlm.nih.gov/gene/?term=${t.id}`;
-        
-        let row = `<tr>
-            <td style="font-weight:bold; color:#6b7280;">#${index + 1}</td>
-            <td><a href="${extLink}" target="_blank" style="color:#2563eb; font-weight:bold; text-decoration:none;">${t.id} ↗</a></td>
-            <td>${t.type === 'RNA' ? '🧬 RNA' : '🔵 Protein'}</td>
-            <td>
-                <div style="font-weight:bold; color:#E64B35;">${t.hits} / ${actualValidatedSeeds} Seeds (${hitPercent}%)</div>
-                <div class="progress-bg"><div class="progress-fill" style="width:${hitPercent}%;"></div></div>
-            </td>
-            <td><div style="max-width:250px; display:flex; flex-wrap:wrap;">${seedsHtml}</div></td>
-            <td><div style="max-width:200px;">${dbsHtml}</div></td>
-        </tr>`;
-        tbody.insertAdjacentHTML('beforeend', row);
-    });
+    renderTableWindow();
+}
+
+// 🚀 核心：動態建立樞紐分析表
+function buildTable() {
+    if(!window.hasData) return;
+    const minHits = parseInt(document.getElementById('minHits').value);
+    const consensus = document.getElementById('stringency').value === 'consensus';
+    if(!tableSoA) loadTableSoA();
+
+    const req = ++tableReqId; // 只採用最後一次請求的結果
+    const worker = getTableWorker();
+    if(worker) worker.postMessage({ type: 'rank', req: req, minHits: minHits, consensus: consensus });
+    else showTableOrder(rankCandidates(tableSoA.hits, tableSoA.dbCount, tableSoA.isSeed, minHits, consensus));
 }
 
 document.getElementById('seeds').addEventListener('input', function() {
@@ -226,9 +389,148 @@ function toggleInspector() {
     inspectorOpen = !inspectorOpen;
 }
 
+// 有上限的並行池：最多 n 個 worker 依序領取工作，結果依原順序回傳
+async function runPool(items, n, fn) {
+    const out = new Array(items.length);
+    let next = 0;
+    async function worker() {
+        while(next < items.length) {
+            const i = next++;
+            out[i] = await fn(items[i], i);
+        }
+    }
+    await Promise.all(Array.from({length: Math.min(n, items.length)}, worker));
+    return out;
+}
+
+// 逐塊讀取 NDJSON：資料邊到邊解析，不必等整個回應下載完才 JSON.parse
+async function readNdjson(res, onItem) {
+    const reader = res.body.getReader();
+    const dec = new TextDecoder();
+    let buf = '';
+    while(true) {
+        const {value, done} = await reader.read();
+        if(done) break;
+        buf += dec.decode(value, {stream: true});
+        let start = 0, i;
+        while((i = buf.indexOf('\\n', start)) >= 0) {
+            if(i > start) onItem(JSON.parse(buf.slice(start, i)));
+            start = i + 1;
+        }
+        buf = buf.slice(start);
+    }
+    buf += dec.decode();
+    if(buf.trim()) onItem(JSON.parse(buf));
+}
+
+// 🚀 IndexedDB 快取：同一組 (seed, mode, all_seeds, limit) 重跑分析時完全不走網路
+const NET_CACHE_TTL_MS = 24 * 3600 * 1000; // 與伺服器 Cache-Control max-age 一致，DB 重建後最多一天就會換新
+var netCacheDb = null;
+function openNetCache() {
+    if(netCacheDb) return netCacheDb;
+    netCacheDb = new Promise(resolve => {
+        if(!window.indexedDB) return resolve(null);
+        const req = indexedDB.open('regulon', 1);
+        req.onupgradeneeded = () => req.result.createObjectStore('net');
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => resolve(null); // 無痕模式等無法使用 IndexedDB 時直接略過快取
+    });
+    return netCacheDb;
+}
+function idbRequest(db, txMode, fn) {
+    return new Promise(resolve => {
+        try {
+            const tx = db.transaction('net', txMode);
+            const req = fn(tx.objectStore('net'));
+            tx.oncomplete = () => resolve(req.result);
+            tx.onerror = tx.onabort = () => resolve(undefined);
+        } catch(err) { resolve(undefined); }
+    });
+}
+async function cacheGet(key) {
+    const db = await openNetCache();
+    if(!db) return null;
+    const hit = await idbRequest(db, 'readonly', store => store.get(key));
+    return (hit && Date.now() - hit.ts < NET_CACHE_TTL_MS) ? hit.data : null;
+}
+async function cachePut(key, data) {
+    const db = await openNetCache();
+    if(db) await idbRequest(db, 'readwrite', store => store.put({ ts: Date.now(), data: data }, key));
+}
+async function clearNetCache() {
+    const db = await openNetCache();
+    if(db) await idbRequest(db, 'readwrite', store => store.clear());
+    document.getElementById('status').innerText = "🧹 Local query cache cleared.";
+}
+
+// 🚀 小型資料庫：整個 .db 只下載一次，交給 sql.js (SQLite WASM) 在瀏覽器本地查詢，重跑分析完全不走網路
+// 完整的 1.7 GB 人類交互作用庫遠超過上限 (伺服器端 /regulon.db 也會回 413)，會自動沿用伺服器查詢
+const LOCAL_DB_MAX_BYTES = 256 * 1024 * 1024;
+const SQLJS_BASE = "https://cdn.jsdelivr.net/npm/sql.js@1.10.3/dist/";
+var localDbPromise = null;
+function loadScript(src) {
+    return new Promise((resolve, reject) => {
+        const el = document.createElement('script');
+        el.src = src; el.onload = resolve; el.onerror = reject;
+        document.head.appendChild(el);
+    });
+}
+function openLocalDb() {
+    if(localDbPromise) return localDbPromise;
+    localDbPromise = (async () => {
+        try {
+            const head = await fetch('/regulon.db', { method: 'HEAD' });
+            const size = parseInt(head.headers.get('content-length') || '0');
+            if(!head.ok || !size || size > LOCAL_DB_MAX_BYTES) return null;
+            document.getElementById('status').innerText = `⏳ Loading local database (${Math.round(size / 1048576)} MB)...`;
+            await loadScript(SQLJS_BASE + 'sql-wasm.js');
+            const SQL = await initSqlJs({ locateFile: f => SQLJS_BASE + f });
+            const buf = await (await fetch('/regulon.db')).arrayBuffer();
+            return new SQL.Database(new Uint8Array(buf));
+        } catch(err) {
+            console.warn("Local DB unavailable, falling back to server queries", err);
+            return null;
+        }
+    })();
+    return localDbPromise;
+}
+// 與 scientific_db._query_network 相同的排序：seed 之間的連線優先，其餘依資料庫數遞減；
+// 同一標靶在 SQL 內 GROUP BY 取排名最高的一列 (bare column) 再 LIMIT，回傳筆數與伺服器一致
+function localRank(db) {
+    if(db._regulonRank === undefined) {
+        const cols = db.exec("PRAGMA table_info(interactions)")[0];
+        const hasCount = cols && cols.values.some(r => r[1] === 'db_count');
+        db._regulonRank = hasCount ? "db_count" : "length(db) - length(replace(db, ',', ''))";
+    }
+    return db._regulonRank;
+}
+function queryLocal(db, seed, mode, seedList, limit) {
+    let sql = `SELECT target, type, db, MAX(${localRank(db)}) AS best FROM interactions WHERE seed = ?`;
+    const params = [seed];
+    const marks = seedList.map(() => '?').join(',');
+    if(mode === 'RNA' || mode === 'Protein') {
+        if(seedList.length) { sql += ` AND (type = '${mode}' OR target IN (${marks}))`; params.push(...seedList); }
+        else sql += ` AND type = '${mode}'`;
+    }
+    sql += " GROUP BY target";
+    if(seedList.length) { sql += ` ORDER BY CASE WHEN target IN (${marks}) THEN 1 ELSE 0 END DESC, best DESC LIMIT ?`; params.push(...seedList); }
+    else sql += " ORDER BY best DESC LIMIT ?";
+    params.push(limit);
+    const stmt = db.prepare(sql);
+    stmt.bind(params);
+    const edges = [];
+    while(stmt.step()) {
+        const row = stmt.get();
+        edges.push({target: row[0], mol_type: row[1], database: (row[2] || '').split(',').map(d => d.trim()).filter(d => d)});
+    }
+    stmt.free();
+    return {edges: edges};
+}
+
 async function fetchData(){
     const seedsStr = document.getElementById('seeds').value;
     currentSeeds = seedsStr.split(/[\s,;]+/).map(x=>x.trim().toUpperCase()).filter(x=>x);
+    seedSet = new Set(currentSeeds);
     const mode = document.getElementById('interactomeMode').value;
     const queryLimit = document.getElementById('density').value;
     const status = document.getElementById('status');
@@ -239,31 +541,67 @@ async function fetchData(){
     pCont.style.display = 'block'; pBar.style.width = '0%';
     status.innerText = "Initializing Deep Query...";
     selectedNode = null;
-    rawEdges=[]; nodeProps={}; nodeDBs={}; overlap={};
+    rawEdges=[]; nodeProps={}; nodeDBs={}; overlap={}; targetIndex = new Map();
     const seedsParam = encodeURIComponent(currentSeeds.join(','));
     actualValidatedSeeds = 0; 
 
-    for(let i=0; i<currentSeeds.length; i++){
-        let seed = currentSeeds[i];
-        status.innerText = `⏳ Querying DB for: ${seed}...`;
+    // 🚀 並行查詢 (最多 8 條同時進行)，總耗時 ≈ 最慢的一個請求，而非所有請求相加
+    let done = 0;
+    const localDb = await openLocalDb();
+    status.innerText = `⏳ Querying DB for ${currentSeeds.length} seeds...`;
+    const responses = localDb ? currentSeeds.map(seed => queryLocal(localDb, seed, mode, currentSeeds, parseInt(queryLimit))) : await runPool(currentSeeds, 8, async (seed) => {
+        let r = null;
         try {
-            const url = `/network?seed=${seed}&mode=${mode}&all_seeds=${seedsParam}&limit=${queryLimit}`;
-            const res = await fetch(url);
-            const r = await res.json();
-            if(r && r.edges && r.edges.length > 0){
-                actualValidatedSeeds++; 
-                r.edges.forEach(e=>{
-                    let t = e.target.toUpperCase(); if(seed===t) return; 
-                    rawEdges.push({from:seed, to:t, db:e.database});
-                    nodeProps[t]=e.mol_type;
-                    if(!nodeDBs[t]) nodeDBs[t]=new Set();
-                    e.database.split(',').forEach(d=>nodeDBs[t].add(d.trim()));
-                    overlap[t]=(overlap[t]||0)+1;
-                });
+            const url = `/network?seed=${seed}&mode=${mode}&all_seeds=${seedsParam}&limit=${queryLimit}&format=ndjson`;
+            r = await cacheGet(url);
+            if(!r) {
+                const res = await fetch(url);
+                let ok = false;
+                // NDJSON 每行一個 edge：debug_status 在 X-Debug-Status header，沒有 db_used 欄位
+                if(res.body && (res.headers.get('content-type') || '').includes('ndjson')) {
+                    const edges = [];
+                    await readNdjson(res, e => edges.push(e));
+                    r = {edges: edges};
+                    ok = res.ok && res.headers.get('X-Debug-Status') === 'No error';
+                } else {
+                    r = await res.json(); // 伺服器出錯時仍回傳一般 JSON (CRASH_PREVENTED)
+                    ok = res.ok && r.debug_status === 'No error';
+                }
+                if(ok) await cachePut(url, r); // 只快取成功的查詢
             }
         } catch(err) { console.error("API Error", err); }
-        pBar.style.width = Math.round(((i + 1) / currentSeeds.length) * 100) + '%';
-    }
+        done++;
+        pBar.style.width = Math.round((done / currentSeeds.length) * 100) + '%';
+        status.innerText = `⏳ Queried ${done} / ${currentSeeds.length} seeds...`;
+        return r;
+    });
+
+    // 全部回來後再依 seed 順序一次整理，避免並行時交錯寫入；
+    // 同一趟順便建好 targetIndex，資料庫字串只 split 這一次
+    responses.forEach((r, i) => {
+        let seed = currentSeeds[i];
+        if(r && r.edges && r.edges.length > 0){
+            actualValidatedSeeds++; 
+            r.edges.forEach(e=>{
+                let t = e.target.toUpperCase(); if(seed===t) return; 
+                let entry = targetIndex.get(t);
+                if(!entry) {
+                    entry = { id: t, type: e.mol_type, hits: 0, boundSeeds: new Set(), dbs: new Set(), edges: [] };
+                    targetIndex.set(t, entry);
+                    nodeDBs[t] = entry.dbs;
+                }
+                // 伺服器已把 database 拆成陣列；舊格式 (逗號字串) 可能還留在瀏覽器 HTTP 快取裡，仍相容
+                const dbArr = Array.isArray(e.database) ? e.database : e.database.split(',').map(d=>d.trim());
+                const edge = {from:seed, to:t, dbArr:dbArr};
+                rawEdges.push(edge);
+                entry.edges.push(edge);
+                nodeProps[t]=e.mol_type; entry.type = e.mol_type;
+                edge.dbArr.forEach(d=>entry.dbs.add(d));
+                if(!entry.boundSeeds.has(seed)) { entry.boundSeeds.add(seed); entry.hits++; }
+                overlap[t]=(overlap[t]||0)+1;
+            });
+        }
+    });
     
     let finalMax = actualValidatedSeeds > 0 ? actualValidatedSeeds : 1;
     let slider = document.getElementById('minHits');
@@ -274,6 +612,7 @@ async function fetchData(){
         document.getElementById('hitVal').innerText = finalMax;
     }
     window.hasData = true; 
+    netGraph = null; tableSoA = null; // 新資料：重建完整圖與表格索引
     applyFilterAndRender(); 
     if(currentView === 'table') buildTable(); // 如果在表格模式下重新分析，自動更新表
     
@@ -284,9 +623,10 @@ async function fetchData(){
 function updateInspectorNode(id) {
     const content = document.getElementById('inspect-content');
     if(!id) { content.innerHTML = "<div style='color:#6b7280;font-style:italic;'>Hover or click a node/edge to view evidence.</div>"; return; }
-    const isSeed = currentSeeds.includes(id);
+    const isSeed = seedSet.has(id);
+    const seedClass = document.getElementById('seedType').value;
     const dbs = Array.from(nodeDBs[id]||[]).map(d=>`<span class="badge badge-db">${d}</span>`).join('');
-    content.innerHTML = `<h3 style="color:#2563eb;margin-top:0;">${id}</h3><b>Type:</b> ${isSeed ? 'Input Seed (Bait)' : (nodeProps[id]||'Target')}<br><b>Regulon Hit Rate:</b> ${overlap[id]||'-'}<br><div style='margin-top:10px;'><b>Evidence Databases (Union):</b><br>${isSeed ? 'User Defined Origin' : dbs}</div>`;
+    content.innerHTML = `<h3 style="color:#2563eb;margin-top:0;">${id}</h3><b>Type:</b> ${isSeed ? `Input Seed (Bait, ${seedClass})` : (nodeProps[id]||'Target')}<br><b>Regulon Hit Rate:</b> ${overlap[id]||'-'}<br><div style='margin-top:10px;'><b>Evidence Databases (Union):</b><br>${isSeed ? 'User Defined Origin' : dbs}</div>`;
 }
 
 function updateInspectorEdge(edgeId) {
@@ -295,100 +635,253 @@ function updateInspectorEdge(edgeId) {
     const parts = edgeId.split("_");
     const rawE = rawEdges.find(e => e.from === parts[0] && e.to === parts[1]);
     if(rawE) {
-        const dbs = rawE.db.split(',').map(d=>`<span class="badge badge-db">${d.trim()}</span>`).join('');
+        const dbs = rawE.dbArr.map(d=>`<span class="badge badge-db">${d}</span>`).join('');
         content.innerHTML = `<h3 style="color:#E64B35;margin-top:0;">🔗 Single Interaction</h3><b>From:</b> ${rawE.from}<br><b>To:</b> ${rawE.to}<br><div style='margin-top:10px;'><b>Supported by Databases:</b><br>${dbs}</div>`;
     }
 }
 
-function applyFilterAndRender() {
-    const minHits = parseInt(document.getElementById('minHits').value);
-    const stringency = document.getElementById('stringency').value;
-    const seedTypeInput = document.getElementById('seedType').value;
-    let validNodes = new Set(currentSeeds);
-    let edgesForVis = [];
-
-    rawEdges.forEach(e=>{
-        let dbSet = nodeDBs[e.to];
-        let isConsensus = dbSet && dbSet.size > 1;
-        if(stringency === 'consensus' && !isConsensus && !currentSeeds.includes(e.to)) return;
-        
-        let hitCount = overlap[e.to] || 0;
-        if(hitCount >= minHits || currentSeeds.includes(e.to)){
-            let isShared = hitCount >= 2;
-            edgesForVis.push({
-                id: e.from + "_" + e.to, 
-                from: e.from, to: e.to, 
-                width: isShared ? 2 : 1,
-                color: { color: isShared ? "#94a3b8" : "#e5e7eb", opacity: isShared ? 0.9 : 0.4, hover: "#E64B35", highlight: "#E64B35" }
-            });
-            validNodes.add(e.to);
-        }
-    });
+// 🚀 分析完成後只建一次完整圖 (所有 seed + target)，之後篩選只切換 hidden 屬性，不重建 Sigma、不重跑佈局
+var netGraph = null;
+var shownNodes = new Set();
+var shownEdges = new Set();
+// 佈局用的 SoA 緩衝區 (節點座標 xy 交錯、連線端點索引)，跨分析重複使用，容量不足才加倍
+var nodeIndex = new Map();
+var nodeXY = new Float32Array(0);
+var edgeFromTo = new Uint32Array(0);
+var edgeCount = 0;
+function growTyped(arr, n, Ctor) {
+    if(arr.length >= n) return arr;
+    let cap = Math.max(1024, arr.length);
+    while(cap < n) cap *= 2;
+    return new Ctor(cap);
+}
+// 連線只有兩種樣式，用調色盤索引取代每條連線各自的樣式物件
+const EDGE_TIERS = [{ size: 1, color: "#e5e7eb" }, { size: 2, color: "#94a3b8" }];
 
-    let nodesForVis = Array.from(validNodes).map(id=>{
-        let isSeed = currentSeeds.includes(id);
+function buildGraph() {
+    const graph = new graphology.Graph();
+    nodeIndex = new Map();
+    nodeXY = growTyped(nodeXY, 2 * (currentSeeds.length + targetIndex.size), Float32Array);
+    edgeFromTo = growTyped(edgeFromTo, 2 * rawEdges.length, Uint32Array);
+    edgeCount = 0;
+    const addNode = (id)=>{
+        if(nodeIndex.has(id)) return;
+        const i = nodeIndex.size;
+        nodeIndex.set(id, i);
+        nodeXY[2*i] = Math.random(); nodeXY[2*i+1] = Math.random();
+        let isSeed = seedSet.has(id);
         let mType = nodeProps[id] || "Unknown";
         let count = overlap[id]||0;
         let isShared = count >= 2 && !isSeed;
-        
-        let nShape = "dot";
-        if (isSeed) {
-            nShape = (seedTypeInput === "RNA") ? "diamond" : "dot";
-        } else {
-            nShape = (mType === "RNA") ? "diamond" : "dot";
-        }
 
+        // Sigma 的 size 是半徑 (px)，沿用原本 vis.js 的比例後減半
         let maxTargetSize = 45; 
         let baseSize = isSeed ? 20 : Math.min(maxTargetSize, 12 + (count * 4));
-        let fontSize = isSeed ? 14 : Math.min(18, 11 + (count * 1.5));
-
-        return {
-            id: id, label: id, shape: nShape,
-            color: { background: isSeed ? "#E64B35" : (mType === "RNA" ? "#00A087" : "#4DBBD5"), border: isShared ? "#F39C12" : "#ccc", hover: { border: "#F39C12", background: "#fde047" }, highlight: { border: "#E64B35", background: "#fca5a5" } },
-            borderWidth: isShared ? 4 : 1.5,
-            size: baseSize,
-            font: { face:'Arial', size: fontSize, color: "#333", strokeWidth: 4, strokeColor: "#ffffff", bold: isShared || isSeed },
-            shadow: isShared ? {enabled: true, color: 'rgba(243, 156, 18, 0.3)', size: 10, x: 0, y: 0} : false
-        };
+
+        graph.addNode(id, {
+            label: id, x: nodeXY[2*i], y: nodeXY[2*i+1], size: baseSize / 2,
+            color: isSeed ? "#E64B35" : (mType === "RNA" ? "#00A087" : "#4DBBD5"),
+            forceLabel: isShared || isSeed,
+            zIndex: isSeed ? 2 : (isShared ? 1 : 0),
+            hidden: true
+        });
+    };
+    currentSeeds.forEach(addNode);
+    targetIndex.forEach(t=>{
+        addNode(t.id);
+        const tier = EDGE_TIERS[(overlap[t.id] || 0) >= 2 ? 1 : 0];
+        t.edges.forEach(e=>{
+            addNode(e.from);
+            let id = e.from + "_" + e.to;
+            if(graph.hasEdge(id)) return;
+            graph.addEdgeWithKey(id, e.from, e.to, { size: tier.size, color: tier.color, hidden: true });
+            edgeFromTo[2*edgeCount] = nodeIndex.get(e.from);
+            edgeFromTo[2*edgeCount+1] = nodeIndex.get(e.to);
+            edgeCount++;
+        });
     });
 
-    if(net) net.destroy();
+    if(net) net.kill();
+    hoveredNode = null;
+    netGraph = graph;
+    shownNodes = new Set(); shownEdges = new Set();
+    lodTier = 'mid'; lodInView = null; lodGrid = null;
+    startLayout(graph);
     const container = document.getElementById('mynetwork');
-    net = new vis.Network(container, {nodes:nodesForVis, edges:edgesForVis}, {
-        physics: {
-            solver: 'forceAtlas2Based',
-            forceAtlas2Based: { gravitationalConstant: -120, centralGravity: 0.01, springLength: 200, springConstant: 0.05, damping: 0.4, avoidOverlap: 0.8 },
-            stabilization: {iterations: 300}
-        },
-        interaction: { dragView: true, zoomView: true, hover: true, hoverConnectedEdges: true }, 
-        edges: { smooth: { type: 'continuous', roundness: 0.1 } }
+    net = new Sigma(graph, container, {
+        renderEdgeLabels: false,
+        defaultNodeType: 'circle',
+        enableEdgeClickEvents: true,
+        enableEdgeHoverEvents: true,
+        allowInvalidContainer: true, // 在表格模式 (容器隱藏) 下重新分析時不報錯
+        zIndex: true,
+        nodeReducer: (node, data) => (lodTier === 'far' && !seedSet.has(node)) ? { ...data, label: null, forceLabel: false } : data,
+        edgeReducer: (edge, data) => {
+            if(hoveredNode && graph.hasExtremity(edge, hoveredNode)) return { ...data, color: "#E64B35", zIndex: 1 };
+            if(lodTier === 'far' && data.size <= 1) return { ...data, hidden: true };
+            if(lodInView && !lodInView.has(graph.source(edge)) && !lodInView.has(graph.target(edge))) return { ...data, hidden: true };
+            return data;
+        }
     });
+    net.getCamera().on('updated', scheduleLod);
 
-    net.once("stabilizationIterationsDone", function() {
-        net.setOptions({ physics: { enabled: false } });
-    });
+    net.on("enterNode", ({node})=>{ hoveredNode = node; net.refresh(); if(!selectedNode) updateInspectorNode(node); });
+    net.on("leaveNode", ()=>{ hoveredNode = null; net.refresh(); if(!selectedNode) updateInspectorNode(null); });
+    net.on("enterEdge", ({edge})=>{ if(!selectedNode) updateInspectorEdge(edge); });
+    net.on("leaveEdge", ()=>{ if(!selectedNode) updateInspectorNode(null); });
+    net.on("clickNode", ({node})=>{ selectedNode = node; updateInspectorNode(selectedNode); });
+    net.on("clickEdge", ({edge})=>{ selectedNode = edge; updateInspectorEdge(selectedNode); });
+    net.on("clickStage", ()=>{ selectedNode = null; updateInspectorNode(null); });
+}
+
+function applyFilterAndRender() {
+    if(!netGraph) buildGraph();
+    const minHits = parseInt(document.getElementById('minHits').value);
+    const stringency = document.getElementById('stringency').value;
+    let validNodes = new Set(currentSeeds);
+    let validEdges = new Set();
 
-    net.on("hoverNode", (params)=>{ if(!selectedNode) updateInspectorNode(params.node); });
-    net.on("hoverEdge", (params)=>{ if(!selectedNode) updateInspectorEdge(params.edge); });
-    net.on("blurNode", ()=>{ if(!selectedNode) updateInspectorNode(null); });
-    net.on("blurEdge", ()=>{ if(!selectedNode) updateInspectorNode(null); });
-    net.on("click", (params)=>{
-        if(params.nodes.length){ selectedNode = params.nodes[0]; updateInspectorNode(selectedNode); } 
-        else if(params.edges.length) { selectedNode = params.edges[0]; updateInspectorEdge(selectedNode); } 
-        else { selectedNode = null; updateInspectorNode(null); }
+    // 篩選條件只跟 target 有關：逐個 target 判斷一次，通過才展開它的連線
+    targetIndex.forEach(t=>{
+        let isSeedTarget = seedSet.has(t.id);
+        if(stringency === 'consensus' && t.dbs.size <= 1 && !isSeedTarget) return;
+        
+        let hitCount = overlap[t.id] || 0;
+        if(hitCount >= minHits || isSeedTarget){
+            t.edges.forEach(e=>validEdges.add(e.from + "_" + e.to));
+            validNodes.add(t.id);
+        }
     });
+
+    // 只更新與上一次篩選結果不同的節點/連線
+    shownNodes.forEach(id=>{ if(!validNodes.has(id)) netGraph.setNodeAttribute(id, 'hidden', true); });
+    validNodes.forEach(id=>{ if(!shownNodes.has(id)) netGraph.setNodeAttribute(id, 'hidden', false); });
+    shownEdges.forEach(id=>{ if(!validEdges.has(id)) netGraph.setEdgeAttribute(id, 'hidden', true); });
+    validEdges.forEach(id=>{ if(!shownEdges.has(id)) netGraph.setEdgeAttribute(id, 'hidden', false); });
+    shownNodes = validNodes; shownEdges = validEdges;
+    if(selectedNode && netGraph.hasNode(selectedNode) && !validNodes.has(selectedNode)) { selectedNode = null; updateInspectorNode(null); }
+}
+
+// 🚀 LOD：依縮放程度決定畫多少細節 (Sigma camera ratio > 1 代表比全圖更遠)
+const LOD_FAR_RATIO = 1.5;  // 遠景：只留粗連線 (共享 target)，標籤只畫 seed
+const LOD_NEAR_RATIO = 0.5; // 近景：兩端都在畫面外的連線不畫
+const LOD_GRID = 64;
+var lodTier = 'mid';
+var lodInView = null; // 近景時畫面內的節點；null = 不裁切
+var lodGrid = null;
+var lodTimer = null;
+
+// 均勻網格空間索引：佈局結束後依 nodeXY 建一次，查詢視窗內節點只看相交的格子
+function buildLodGrid() {
+    const n = nodeIndex.size;
+    if(n === 0) { lodGrid = null; return; }
+    const ids = Array.from(nodeIndex.keys());
+    let x0 = Infinity, y0 = Infinity, x1 = -Infinity, y1 = -Infinity;
+    for(let i = 0; i < n; i++) {
+        const x = nodeXY[2*i], y = nodeXY[2*i+1];
+        if(x < x0) x0 = x; if(x > x1) x1 = x; if(y < y0) y0 = y; if(y > y1) y1 = y;
+    }
+    const cw = (x1 - x0) / LOD_GRID || 1, ch = (y1 - y0) / LOD_GRID || 1;
+    const cells = Array.from({length: LOD_GRID * LOD_GRID}, () => []);
+    for(let i = 0; i < n; i++) {
+        const cx = Math.min(LOD_GRID - 1, Math.floor((nodeXY[2*i] - x0) / cw));
+        const cy = Math.min(LOD_GRID - 1, Math.floor((nodeXY[2*i+1] - y0) / ch));
+        cells[cy * LOD_GRID + cx].push(ids[i]);
+    }
+    lodGrid = { x0, y0, cw, ch, cells };
+}
+
+function queryLodGrid(qx0, qy0, qx1, qy1) {
+    const g = lodGrid, out = new Set();
+    const clamp = v => Math.max(0, Math.min(LOD_GRID - 1, v));
+    const cx0 = clamp(Math.floor((Math.min(qx0, qx1) - g.x0) / g.cw)), cx1 = clamp(Math.floor((Math.max(qx0, qx1) - g.x0) / g.cw));
+    const cy0 = clamp(Math.floor((Math.min(qy0, qy1) - g.y0) / g.ch)), cy1 = clamp(Math.floor((Math.max(qy0, qy1) - g.y0) / g.ch));
+    for(let cy = cy0; cy <= cy1; cy++)
+        for(let cx = cx0; cx <= cx1; cx++)
+            g.cells[cy * LOD_GRID + cx].forEach(id => out.add(id));
+    return out;
+}
+
+function updateLod() {
+    lodTimer = null;
+    if(!net) return;
+    const ratio = net.getCamera().ratio;
+    const tier = ratio > LOD_FAR_RATIO ? 'far' : (ratio < LOD_NEAR_RATIO ? 'near' : 'mid');
+    let inView = null;
+    if(tier === 'near' && lodGrid) {
+        const dims = net.getDimensions();
+        // 視窗四角換算回圖座標，外擴一格避免邊緣的節點閃爍
+        const a = net.viewportToGraph({ x: 0, y: 0 }), b = net.viewportToGraph({ x: dims.width, y: dims.height });
+        inView = queryLodGrid(a.x - lodGrid.cw, a.y - lodGrid.ch, b.x + lodGrid.cw, b.y + lodGrid.ch);
+    }
+    if(tier === lodTier && !inView && !lodInView) return; // 細節層級沒變就不必重跑 reducer
+    lodTier = tier; lodInView = inView;
+    net.refresh();
+}
+
+// 相機每一幀都會觸發 updated；等拖曳/縮放停下 120ms 再重算，避免每幀都重跑 reducer
+function scheduleLod() {
+    if(lodTimer) clearTimeout(lodTimer);
+    lodTimer = setTimeout(updateLod, 120);
+}
+
+// 🚀 佈局交給 Web Worker：主執行緒只負責繪圖，不會被 300 輪力導向計算卡住
+var layoutWorker = null;
+var layoutWorkerUrl = null;
+function startLayout(graph) {
+    if(layoutWorker) { layoutWorker.terminate(); layoutWorker = null; }
+    // buildGraph 已經把座標與連線端點打包成 typed array，這裡只複製實際使用的長度送進 worker
+    const pos = nodeIndex;
+    const n = nodeIndex.size;
+    const xy = nodeXY.slice(0, 2 * n);
+    const edges = edgeFromTo.slice(0, 2 * edgeCount);
+
+    try {
+        if(!layoutWorkerUrl) {
+            const src = document.getElementById('fa2-worker-src').textContent;
+            layoutWorkerUrl = URL.createObjectURL(new Blob([src], { type: 'text/javascript' }));
+        }
+        layoutWorker = new Worker(layoutWorkerUrl);
+    } catch(err) {
+        // 不支援 Worker 的環境：退回主執行緒同步計算
+        const fa2 = graphologyLibrary.layoutForceAtlas2;
+        fa2.assign(graph, { iterations: 300, settings: fa2.inferSettings(graph) });
+        graph.forEachNode((key, attr) => { const i = pos.get(key); nodeXY[2*i] = attr.x; nodeXY[2*i+1] = attr.y; });
+        buildLodGrid();
+        return;
+    }
+    const worker = layoutWorker;
+    worker.onmessage = (ev) => {
+        const out = ev.data.xy;
+        nodeXY.set(out);
+        graph.updateEachNodeAttributes((key, attr) => {
+            const i = pos.get(key);
+            attr.x = out[2*i]; attr.y = out[2*i+1];
+            return attr;
+        }, { attributes: ['x', 'y'] });
+        if(ev.data.done) { worker.terminate(); if(layoutWorker === worker) layoutWorker = null; buildLodGrid(); scheduleLod(); }
+        else worker.postMessage({ recycle: out }, [out.buffer]); // 緩衝區送回 worker 下一輪重用
+    };
+    worker.postMessage({ xy: xy, edges: edges, iterations: 300 }, [xy.buffer, edges.buffer]);
 }
 
 function exportCSV() {
     if(!window.hasData || rawEdges.length === 0) { alert("No data to export!"); return; }
-    let csvContent = "data:text/csv;charset=utf-8,Seed,Target,Target_Type,Databases\\n";
+    // 逐批編碼成 Uint8Array 再組成 Blob：不產生巨大的 data: URI，也省掉 encodeURI 整串再跑一次
+    const CSV_BATCH = 1000;
+    const enc = new TextEncoder();
+    const chunks = [enc.encode("Seed,Target,Target_Type,Databases\\n")];
+    let lines = [];
     rawEdges.forEach(e => {
         let tType = nodeProps[e.to] || "Unknown";
         let dbStr = Array.from(nodeDBs[e.to] || []).join(" | ");
-        csvContent += `${e.from},${e.to},${tType},${dbStr}\\n`;
+        lines.push(`${e.from},${e.to},${tType},${dbStr}\\n`);
+        if(lines.length >= CSV_BATCH) { chunks.push(enc.encode(lines.join(''))); lines = []; }
     });
-    const encodedUri = encodeURI(csvContent);
-    const link = document.createElement("a"); link.setAttribute("href", encodedUri); link.setAttribute("download", "Regulon_Analysis_Export.csv");
+    if(lines.length) chunks.push(enc.encode(lines.join('')));
+    const url = URL.createObjectURL(new Blob(chunks, { type: 'text/csv;charset=utf-8' }));
+    const link = document.createElement("a"); link.setAttribute("href", url); link.setAttribute("download", "Regulon_Analysis_Export.csv");
     document.body.appendChild(link); link.click(); document.body.removeChild(link);
+    setTimeout(() => URL.revokeObjectURL(url), 0); // 等瀏覽器開始下載後再釋放
 }
 </script></body></html>"""
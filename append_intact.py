@@ -1,9 +1,14 @@
 import sqlite3
 import os
 import re
+import mmap
 
 INTACT_FILE = r"C:\Users\biobe\Desktop\API_Interactomes\intact.txt"
 DB_PATH = r"C:\Users\biobe\Desktop\API_Interactomes\regulon.db"
+BATCH_SIZE = 50000
+
+# 預先編譯的單一 Alias 正則：(gene name) 與 (display_short) 合併成一個交替式，整個字串只掃一次
+_ALIAS_RE = re.compile(r'([a-zA-Z0-9_-]+)\((?P<kind>gene name|display_short)\)')
 
 # 嚴格遵照你的指示：絕對不亂猜，依靠官方 MI Ontology 來判斷分子屬性
 def get_mol_type(type_str):
@@ -17,15 +22,39 @@ def get_mol_type(type_str):
 
 # 從 Alias 欄位精準萃取 Gene Name (例如：提取 DROSHA 而不是 Uniprot ID)
 def extract_gene_name(alias_str, id_str):
-    # 優先找 (gene name)
-    m = re.search(r'([a-zA-Z0-9_-]+)\(gene name\)', alias_str)
-    if m: return m.group(1).upper()
-    # 退而求其次找 (display_short)
-    m = re.search(r'([a-zA-Z0-9_-]+)\(display_short\)', alias_str)
-    if m: return m.group(1).upper()
+    # 優先找 (gene name)；掃描途中先記下第一個 (display_short) 當備案
+    best = None
+    for m in _ALIAS_RE.finditer(alias_str):
+        if m.group('kind') == 'gene name': return m.group(1).upper()
+        if best is None: best = m.group(1)
+    # 退而求其次用 (display_short)
+    if best is not None: return best.upper()
     # 如果都沒有，才用原本的 ID
     return id_str.split(':')[1].upper() if ':' in id_str else id_str.upper()
 
+# 光速過濾：mmap 整個檔案，直接在 bytes 上找 taxid:9606，
+# 不含人類 Taxid 的行完全不解碼、不切行，只有命中的那一行才 decode
+_HUMAN_TAXID = b'taxid:9606'
+
+def _iter_human_lines(path):
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        pos = mm.find(b'\n') + 1  # 跳過表頭
+        if pos == 0:
+            return
+        while pos < size:
+            hit = mm.find(_HUMAN_TAXID, pos)
+            if hit < 0:
+                break
+            start = mm.rfind(b'\n', pos, hit) + 1 or pos
+            end = mm.find(b'\n', hit)
+            if end < 0:
+                end = size
+            yield mm[start:end].decode('utf-8', 'ignore')
+            pos = end + 1
+
 def append_intact_data():
     if not os.path.exists(INTACT_FILE):
         print("❌ 找不到 intact.txt，請確認路徑。")
@@ -34,6 +63,10 @@ def append_intact_data():
     print("🚀 啟動 Phase 2 蛋白質體追加引擎...")
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
+    # 批次匯入專用設定：關閉同步寫入、日誌與暫存都放記憶體
+    c.execute('PRAGMA synchronous=OFF')
+    c.execute('PRAGMA journal_mode=MEMORY')
+    c.execute('PRAGMA temp_store=MEMORY')
     
     # 建立一個暫存表來放 IntAct 數據
     c.execute('DROP TABLE IF EXISTS raw_intact')
@@ -41,54 +74,73 @@ def append_intact_data():
     
     print("📥 正在解讀 10.9GB IntAct 巨獸 (啟動光速人類過濾 & 嚴格屬性判定)...")
     count = 0
-    with open(INTACT_FILE, 'r', encoding='utf-8', errors='ignore') as f:
-        header = f.readline()
+    buf = []
+    c.execute('BEGIN')
+    for line in _iter_human_lines(INTACT_FILE):
+        cols = line.split('\t')
+        if len(cols) < 22: continue
+        
+        # 二次確認：雙方都必須是人類
+        if 'taxid:9606' not in cols[9] or 'taxid:9606' not in cols[10]:
+            continue
+        
+        # 萃取精準的 Gene Name
+        intA = extract_gene_name(cols[4], cols[0])
+        intB = extract_gene_name(cols[5], cols[1])
         
-        for line in f:
-            # 光速過濾：整行沒有人類 Taxid (9606) 就不浪費 CPU 去 split
-            if 'taxid:9606' not in line:
-                continue
-                
-            cols = line.split('\t')
-            if len(cols) < 22: continue
-            
-            # 二次確認：雙方都必須是人類
-            if 'taxid:9606' not in cols[9] or 'taxid:9606' not in cols[10]:
-                continue
-            
-            # 萃取精準的 Gene Name
-            intA = extract_gene_name(cols[4], cols[0])
-            intB = extract_gene_name(cols[5], cols[1])
-            
-            # 嚴格遵照使用者指示：依賴官方欄位判斷分子屬性
-            typeA = get_mol_type(cols[20])
-            typeB = get_mol_type(cols[21])
-            
-            if intA and intB:
-                c.execute('INSERT INTO raw_intact VALUES (?,?,?,?)', (intA, intB, typeB, 'IntAct'))
-                c.execute('INSERT INTO raw_intact VALUES (?,?,?,?)', (intB, intA, typeA, 'IntAct'))
-                count += 1
-                if count % 100000 == 0:
-                    print(f"  └─ 已成功萃取 {count} 筆高純度人類交互作用...")
+        # 嚴格遵照使用者指示：依賴官方欄位判斷分子屬性
+        typeA = get_mol_type(cols[20])
+        typeB = get_mol_type(cols[21])
+        
+        if intA and intB:
+            buf.append((intA, intB, typeB, 'IntAct'))
+            buf.append((intB, intA, typeA, 'IntAct'))
+            count += 1
+            if len(buf) >= BATCH_SIZE:
+                c.executemany('INSERT INTO raw_intact VALUES (?,?,?,?)', buf)
+                buf.clear()
+            if count % 100000 == 0:
+                print(f"  └─ 已成功萃取 {count} 筆高純度人類交互作用...")
+
+    # 寫入最後一批不足 BATCH_SIZE 的資料
+    if buf:
+        c.executemany('INSERT INTO raw_intact VALUES (?,?,?,?)', buf)
+        buf.clear()
+    conn.commit()
 
     print("⚡ [核心] 正在將 IntAct 完美融入現有 Regulon 資料庫...")
     # 把原來的資料跟新的資料聯集，並去重複
+    c.execute('DROP TABLE IF EXISTS new_interactions')
+    # WITHOUT ROWID + PRIMARY KEY(seed, target)：依 seed 聚簇存放，查詢不必回表
+    c.execute('''
+        CREATE TABLE new_interactions (
+            seed TEXT, target TEXT, type TEXT, db TEXT, db_count INTEGER,
+            PRIMARY KEY (seed, target)
+        ) WITHOUT ROWID
+    ''')
+    # db_count = 來源資料庫數 (db 逗號數 + 1)，先算好讓 /network 排序直接走 idx_seed_dbcount
     c.execute('''
-        CREATE TABLE new_interactions AS 
-        SELECT seed, target, MAX(type) as type, GROUP_CONCAT(DISTINCT db) as db
+        INSERT INTO new_interactions (seed, target, type, db, db_count)
+        SELECT seed, target, type, db, length(db) - length(replace(db, ',', '')) + 1
         FROM (
-            SELECT seed, target, type, db FROM interactions
-            UNION ALL
-            SELECT seed, target, target_type as type, source_db as db FROM raw_intact
+            SELECT seed, target, MAX(type) as type, GROUP_CONCAT(DISTINCT db) as db
+            FROM (
+                SELECT seed, target, type, db FROM interactions
+                UNION ALL
+                SELECT seed, target, target_type as type, source_db as db FROM raw_intact
+            )
+            GROUP BY seed, target
         )
-        GROUP BY seed, target
     ''')
     
     print("🗑️ 清理暫存並重新建立極速索引...")
     c.execute('DROP TABLE interactions')
     c.execute('DROP TABLE raw_intact')
     c.execute('ALTER TABLE new_interactions RENAME TO interactions')
-    c.execute('CREATE INDEX idx_seed ON interactions(seed)')
+    c.execute('CREATE INDEX idx_target ON interactions(target)')  # 反向查詢 / rollup 用
+    c.execute('CREATE INDEX idx_seed_dbcount ON interactions(seed, db_count DESC)')  # /network 排序直接走索引
+    c.execute('DROP TABLE IF EXISTS top_edges')  # 舊的物化前 K 名已過期，重跑 patch_rbp.py 重建
+    c.execute('ANALYZE')  # 更新統計資訊，讓查詢規劃器選對索引
     
     c.execute('SELECT COUNT(*) FROM interactions')
     final_count = c.fetchone()[0]
@@ -12,6 +12,11 @@ def build_fusion_db():
     print("🚀 啟動【最終破甲版】資料庫融合引擎...")
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
+    # 批次匯入專用設定：關閉同步寫入、日誌與暫存都放記憶體
+    c.execute('PRAGMA synchronous=OFF')
+    c.execute('PRAGMA journal_mode=MEMORY')
+    c.execute('PRAGMA temp_store=MEMORY')
+    c.execute('PRAGMA page_size=8192')  # 只對全新的空檔案生效；既有檔案由 patch_rbp.py 的 VACUUM 轉換
     
     c.execute('DROP TABLE IF EXISTS raw_edges')
     c.execute('CREATE TABLE raw_edges (seed TEXT, target TEXT, target_type TEXT, source_db TEXT)')
@@ -19,56 +24,69 @@ def build_fusion_db():
     # 1. 處理 NPInter v5
     if os.path.exists(NPI_FILE):
         print("📥 [1/3] 正在載入 NPInter v5.0...")
-        count = 0
-        with open(NPI_FILE, 'r', encoding='utf-8', errors='ignore') as f:
-            reader = csv.DictReader(f, delimiter='\t')
-            for row in reader:
-                nc = row.get('ncName', '').strip().upper()
-                tar = row.get('tarName', '').strip().upper()
-                if nc and tar:
-                    c.execute('INSERT INTO raw_edges VALUES (?,?,?,?)', (nc, tar, 'Protein', 'NPInter_v5'))
-                    c.execute('INSERT INTO raw_edges VALUES (?,?,?,?)', (tar, nc, 'RNA', 'NPInter_v5'))
-                    count += 1
+        counter = [0]
+        def npi_rows():
+            with open(NPI_FILE, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+                reader = csv.reader(f, delimiter='\t')
+                header = next(reader, [])
+                idx_nc = header.index('ncName') if 'ncName' in header else None
+                idx_tar = header.index('tarName') if 'tarName' in header else None
+                if idx_nc is None or idx_tar is None: return
+                need = max(idx_nc, idx_tar)
+                for cols in reader:
+                    if len(cols) <= need: continue
+                    nc = cols[idx_nc].strip().upper()
+                    tar = cols[idx_tar].strip().upper()
+                    if nc and tar:
+                        yield (nc, tar, 'Protein', 'NPInter_v5')
+                        yield (tar, nc, 'RNA', 'NPInter_v5')
+                        counter[0] += 1
+        # executemany 直接消耗 generator：整個檔案只準備一次 INSERT，逐列在 C 層綁定
+        c.executemany('INSERT INTO raw_edges VALUES (?,?,?,?)', npi_rows())
+        count = counter[0]
         print(f"  └─ 完成！載入 {count} 筆 NPInter 數據。")
 
     # 2. 處理 RNAInter (動態欄位追蹤)
     def process_rnainter(file_path, db_label):
         if not os.path.exists(file_path): return
         print(f"📥 正在載入 {db_label} (啟動動態欄位追蹤與光速過濾)...")
-        count = 0
+        counter = [0]
         
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            header_line = f.readline().strip('\n')
-            header = header_line.split('\t')
-            
-            # 動態尋找真正的欄位位置
-            idx_int1 = next((i for i, x in enumerate(header) if 'INTERACTOR1' in x.upper()), 1)
-            idx_cat1 = next((i for i, x in enumerate(header) if 'CATEGORY1' in x.upper()), 2)
-            idx_int2 = next((i for i, x in enumerate(header) if 'INTERACTOR2' in x.upper()), 4)
-            idx_cat2 = next((i for i, x in enumerate(header) if 'CATEGORY2' in x.upper()), 5)
-            
-            for line in f:
-                line_lower = line.lower()
-                # 暴力光速過濾：整行沒有人類關鍵字直接踢掉，連 split 都省了，速度極快
-                if 'sapiens' not in line_lower and 'human' not in line_lower and '9606' not in line_lower:
-                    continue
-                    
-                cols = line.strip('\n').split('\t')
-                if len(cols) <= max(idx_int1, idx_cat1, idx_int2, idx_cat2): continue
+        def rnainter_rows():
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                header_line = f.readline().strip('\n')
+                header = header_line.split('\t')
                 
-                int1 = cols[idx_int1].strip().upper()
-                cat1 = cols[idx_cat1].strip().upper()
-                int2 = cols[idx_int2].strip().upper()
-                cat2 = cols[idx_cat2].strip().upper()
+                # 動態尋找真正的欄位位置
+                idx_int1 = next((i for i, x in enumerate(header) if 'INTERACTOR1' in x.upper()), 1)
+                idx_cat1 = next((i for i, x in enumerate(header) if 'CATEGORY1' in x.upper()), 2)
+                idx_int2 = next((i for i, x in enumerate(header) if 'INTERACTOR2' in x.upper()), 4)
+                idx_cat2 = next((i for i, x in enumerate(header) if 'CATEGORY2' in x.upper()), 5)
+                need = max(idx_int1, idx_cat1, idx_int2, idx_cat2)
                 
-                if int1 and int2:
-                    t1 = 'Protein' if 'PROTEIN' in cat1 else 'RNA'
-                    t2 = 'Protein' if 'PROTEIN' in cat2 else 'RNA'
+                for line in f:
+                    line_lower = line.lower()
+                    # 暴力光速過濾：整行沒有人類關鍵字直接踢掉，連 split 都省了，速度極快
+                    if 'sapiens' not in line_lower and 'human' not in line_lower and '9606' not in line_lower:
+                        continue
+                        
+                    cols = line.strip('\n').split('\t')
+                    if len(cols) <= need: continue
+                    
+                    int1 = cols[idx_int1].strip().upper()
+                    int2 = cols[idx_int2].strip().upper()
                     
-                    c.execute('INSERT INTO raw_edges VALUES (?,?,?,?)', (int1, int2, t2, db_label))
-                    c.execute('INSERT INTO raw_edges VALUES (?,?,?,?)', (int2, int1, t1, db_label))
-                    count += 1
-                    if count % 200000 == 0: print(f"  └─ 已擷取 {count} 筆人類精華...")
+                    if int1 and int2:
+                        t1 = 'Protein' if 'PROTEIN' in cols[idx_cat1].upper() else 'RNA'
+                        t2 = 'Protein' if 'PROTEIN' in cols[idx_cat2].upper() else 'RNA'
+                        
+                        yield (int1, int2, t2, db_label)
+                        yield (int2, int1, t1, db_label)
+                        counter[0] += 1
+                        if counter[0] % 200000 == 0: print(f"  └─ 已擷取 {counter[0]} 筆人類精華...")
+        
+        c.executemany('INSERT INTO raw_edges VALUES (?,?,?,?)', rnainter_rows())
+        count = counter[0]
                     
         print(f"  └─ 完成！成功搶救 {count} 筆 {db_label} 數據。")
 
@@ -77,20 +95,35 @@ def build_fusion_db():
     
     print("⚡ [核心] 啟動 SQL 聯集與去重複...")
     c.execute('DROP TABLE IF EXISTS interactions')
+    # WITHOUT ROWID + PRIMARY KEY(seed, target)：資料直接依 seed 聚簇存放，
+    # WHERE seed = ? 一次 B-tree 搜尋就拿到 target/type/db，不必再回表查 rowid
+    c.execute('''
+        CREATE TABLE interactions (
+            seed TEXT, target TEXT, type TEXT, db TEXT, db_count INTEGER,
+            PRIMARY KEY (seed, target)
+        ) WITHOUT ROWID
+    ''')
+    # db_count = 來源資料庫數 (db 逗號數 + 1)，先算好讓 /network 排序直接走 idx_seed_dbcount
     c.execute('''
-        CREATE TABLE interactions AS 
-        SELECT 
-            seed, 
-            target, 
-            MAX(target_type) as type, 
-            GROUP_CONCAT(DISTINCT source_db) as db 
-        FROM raw_edges 
-        GROUP BY seed, target
+        INSERT INTO interactions (seed, target, type, db, db_count)
+        SELECT seed, target, type, db, length(db) - length(replace(db, ',', '')) + 1
+        FROM (
+            SELECT 
+                seed, 
+                target, 
+                MAX(target_type) as type, 
+                GROUP_CONCAT(DISTINCT source_db) as db 
+            FROM raw_edges 
+            GROUP BY seed, target
+        )
     ''')
     
     print("🗑️ 清理暫存並建立極速索引...")
     c.execute('DROP TABLE raw_edges')
-    c.execute('CREATE INDEX idx_seed ON interactions(seed)')
+    c.execute('CREATE INDEX idx_target ON interactions(target)')  # 反向查詢 / rollup 用
+    c.execute('CREATE INDEX idx_seed_dbcount ON interactions(seed, db_count DESC)')  # /network 排序直接走索引
+    c.execute('DROP TABLE IF EXISTS top_edges')  # 舊的物化前 K 名已過期，重跑 patch_rbp.py 重建
+    c.execute('ANALYZE')  # 更新統計資訊，讓查詢規劃器選對索引
     conn.commit()
     
     c.execute('SELECT COUNT(*) FROM interactions')
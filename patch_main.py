@@ -1,9 +1,14 @@
-﻿import re
-p = r'C:\Users\biobe\Desktop\API_Interactomes\app\main.py'
+﻿p = r'C:\Users\biobe\Desktop\API_Interactomes\app\main.py'
 with open(p, 'r', encoding='utf-8') as f: c = f.read()
 
-# 清除之前可能的失敗痕跡
-c = re.sub(r'# --- Auto-Injected.*?--------------------------------------------\n', '', c, flags=re.DOTALL)
+# 清除之前可能的失敗痕跡 (標記是固定字串，用 find + 切片線性掃描，不必動用 regex)
+START, END = '# --- Auto-Injected', '--------------------------------------------\n'
+start = c.find(START)
+while start != -1:
+    end = c.find(END, start + len(START))
+    if end == -1: break
+    c = c[:start] + c[end + len(END):]
+    start = c.find(START, start)
 
 # 安全掛載
 if 'viz_pro' not in c and '@app.' in c:
@@ -3,22 +3,93 @@ import os
 
 DB_PATH = r"C:\Users\biobe\Desktop\API_Interactomes\regulon.db"
 
+def ensure_seed_index(c):
+    # convert_db.py / append_intact.py 建出的是 WITHOUT ROWID + PRIMARY KEY(seed, target)，
+    # 資料本身就依 seed 聚簇，WHERE seed = ? 已是 B-tree 搜尋，不需要再多一份索引。
+    # 舊版 (rowid 表) 的 regulon.db 則補上覆蓋索引，SELECT target, type, db 直接從索引取值
+    row = c.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'interactions'").fetchone()
+    if row and 'WITHOUT ROWID' not in row[0].upper():
+        print("⏳ 偵測到舊版資料表，建立 (seed, type, target, db) 覆蓋索引...")
+        c.execute('CREATE INDEX IF NOT EXISTS idx_seed_cover ON interactions(seed, type, target, db)')
+        c.execute('ANALYZE interactions')
+    for plan in c.execute("EXPLAIN QUERY PLAN SELECT target, type, db FROM interactions WHERE seed = ? AND type = ?", ('TP53', 'RNA')):
+        print(f"  └─ 查詢計畫: {plan[-1]}")
+
+def ensure_db_count(c):
+    # 預先算好每列的來源資料庫數 (db 欄位逗號數 + 1)，/network 排序不必每列做兩次字串 replace；舊版資料庫補欄位
+    cols = [r[1] for r in c.execute('PRAGMA table_info(interactions)')]
+    if 'db_count' not in cols:
+        print("⏳ 新增 db_count 欄位並一次性回填...")
+        c.execute('ALTER TABLE interactions ADD COLUMN db_count INTEGER')
+        c.execute("UPDATE interactions SET db_count = length(db) - length(replace(db, ',', '')) + 1")
+    c.execute('CREATE INDEX IF NOT EXISTS idx_seed_dbcount ON interactions(seed, db_count DESC)')
+
+TOP_K = 500
+
+def build_top_edges(c):
+    # 物化每個 seed 的前 TOP_K 名：rn 為整體名次，type_rn 為同 type 內名次 (供 RNA / Protein 模式)。
+    # 必須在 RBP 型別校正之後建立，/network 才會讀到修正後的 type
+    print(f"⏳ 物化每個 seed 的前 {TOP_K} 名 (top_edges)...")
+    c.execute('DROP TABLE IF EXISTS top_edges')
+    c.execute('''
+        CREATE TABLE top_edges (
+            seed TEXT, rn INTEGER, target TEXT, type TEXT, db TEXT, type_rn INTEGER,
+            PRIMARY KEY (seed, rn)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('''
+        INSERT INTO top_edges (seed, rn, target, type, db, type_rn)
+        SELECT seed, rn, target, type, db, type_rn FROM (
+            SELECT seed, target, type, db,
+                ROW_NUMBER() OVER (PARTITION BY seed ORDER BY db_count DESC, target) AS rn,
+                ROW_NUMBER() OVER (PARTITION BY seed, type ORDER BY db_count DESC, target) AS type_rn
+            FROM interactions
+        )
+        WHERE rn <= ? OR type_rn <= ?
+    ''', (TOP_K, TOP_K))
+    c.execute('CREATE INDEX idx_top_type ON top_edges(seed, type, type_rn)')
+
+PAGE_SIZE = 8192
+
+def finalize_db(conn):
+    # 一次性調校：8KB page 讓 6,000 萬筆的 B-tree 少一層，查詢時少一次缺頁。
+    # page_size 只有在 VACUUM 重寫整個檔案時才會生效，且 WAL 模式下不能改，
+    # 所以先切回 DELETE；上線的檔案以 mode=ro 掛在 /mnt/gcs，DELETE 模式不需要旁邊可寫的 -wal/-shm
+    conn.execute('PRAGMA journal_mode=DELETE')
+    conn.execute('PRAGMA auto_vacuum=NONE')
+    if conn.execute('PRAGMA page_size').fetchone()[0] != PAGE_SIZE:
+        print(f"⏳ 以 {PAGE_SIZE} bytes page 重寫資料庫 (VACUUM)...")
+        conn.execute(f'PRAGMA page_size={PAGE_SIZE}')
+        conn.execute('VACUUM')
+    conn.execute('ANALYZE')
+
 def patch_rbps():
     print("🚀 啟動修正引擎...")
     conn = sqlite3.connect(DB_PATH)
+    # 寫入期間用 WAL + synchronous=NORMAL：只在 checkpoint 時 fsync
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA wal_autocheckpoint=10000')  # 累積 10000 頁才 checkpoint，減少寫回次數
     c = conn.cursor()
+    ensure_seed_index(c)
+    ensure_db_count(c)
     
     core_rbps = ["ELAVL1", "WDR33", "RBM15", "YTHDF2", "PTBP1", "HNRNPK", "AGO2", "CTSS", "USP24", "KLHL20", "CD274"]
-    placeholders = ','.join(['?'] * len(core_rbps))
     
-    print(f"⏳ 正在 6,000 萬筆資料中執行單次掃描，強制校正核心標靶...")
-    print("⚠️ 這大約需要 1 到 3 分鐘 (取決於 SSD 速度)，請讓游標閃一下，不要關閉視窗！")
+    print(f"⏳ 正在以 target 索引定位 {len(core_rbps)} 個核心標靶並強制校正...")
+    # 反向索引：舊版資料庫可能沒有 idx_target，補上後每個 RBP 只需一次 B-tree 搜尋
+    c.execute('CREATE INDEX IF NOT EXISTS idx_target ON interactions(target)')
     
-    # 核心優化：用 IN 語法，只掃描一次資料庫
-    query = f"UPDATE interactions SET type = 'Protein' WHERE target IN ({placeholders})"
-    c.execute(query, core_rbps)
+    # 核心優化：每個 RBP 一條 UPDATE ... WHERE target = ?，各自走 idx_target 搜尋，而不是掃描 6,000 萬筆；
+    # 全部包在同一個 BEGIN IMMEDIATE 交易裡，一開始就拿到寫鎖，最後只 commit 一次
+    conn.commit()
+    c.execute('BEGIN IMMEDIATE')
+    c.executemany("UPDATE interactions SET type = 'Protein' WHERE target = ?", [(r,) for r in core_rbps])
+    print(f"  └─ 已校正 {c.rowcount} 筆交互作用")
+    build_top_edges(c)
     
     conn.commit()
+    finalize_db(conn)
     conn.close()
     print("✅ 史詩級 BUG 修復完成！ELAVL1 等分子已經成功穿回蛋白質的外衣！")
 
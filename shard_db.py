@@ -0,0 +1,102 @@
+import sqlite3
+import os
+import json
+import zlib
+
+DIR_PATH = r"C:\Users\biobe\Desktop\API_Interactomes"
+DB_PATH = os.path.join(DIR_PATH, "regulon.db")
+SHARD_DIR = os.path.join(DIR_PATH, "regulon_shards")
+SHARD_COUNT = 64
+BATCH_SIZE = 50000
+
+# 分片規則必須與 app/routers/scientific_db.py 的 _shard_for 一致：crc32 在每個行程都固定
+# (Python 內建 hash() 每次啟動隨機，不能拿來分片)
+def shard_index(seed):
+    return zlib.crc32(seed.encode('utf-8')) % SHARD_COUNT
+
+def shard_path(i):
+    return os.path.join(SHARD_DIR, f"regulon_{i:02d}.db")
+
+def build_shards():
+    if not os.path.exists(DB_PATH):
+        print("❌ 找不到 regulon.db，請先執行 convert_db.py。")
+        return
+
+    print(f"🚀 啟動分片引擎：依 seed 切成 {SHARD_COUNT} 個小型資料庫...")
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    src = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    cols = [r[1] for r in src.execute('PRAGMA table_info(interactions)')]
+    has_db_count = 'db_count' in cols
+    has_top = src.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'top_edges'").fetchone() is not None
+
+    shards = []
+    for i in range(SHARD_COUNT):
+        p = shard_path(i)
+        if os.path.exists(p): os.remove(p)
+        conn = sqlite3.connect(p)
+        # 批次匯入專用設定：關閉同步寫入、日誌與暫存都放記憶體
+        conn.execute('PRAGMA page_size=8192')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute('PRAGMA journal_mode=MEMORY')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('''
+            CREATE TABLE interactions (
+                seed TEXT, target TEXT, type TEXT, db TEXT, db_count INTEGER,
+                PRIMARY KEY (seed, target)
+            ) WITHOUT ROWID
+        ''')
+        if has_top:
+            conn.execute('''
+                CREATE TABLE top_edges (
+                    seed TEXT, rn INTEGER, target TEXT, type TEXT, db TEXT, type_rn INTEGER,
+                    PRIMARY KEY (seed, rn)
+                ) WITHOUT ROWID
+            ''')
+        conn.execute('BEGIN')
+        shards.append(conn)
+
+    def scatter(query, insert):
+        # 整個來源只掃一次，依 seed 分派到各分片的緩衝區，滿 BATCH_SIZE 才 executemany
+        bufs = [[] for _ in range(SHARD_COUNT)]
+        count = 0
+        for row in src.execute(query):
+            i = shard_index(row[0])
+            bufs[i].append(row)
+            if len(bufs[i]) >= BATCH_SIZE:
+                shards[i].executemany(insert, bufs[i])
+                bufs[i].clear()
+            count += 1
+            if count % 1000000 == 0: print(f"  └─ 已分派 {count} 筆...")
+        for i, buf in enumerate(bufs):
+            if buf: shards[i].executemany(insert, buf)
+        return count
+
+    print("📥 分派 interactions...")
+    rank = "db_count" if has_db_count else "length(db) - length(replace(db, ',', '')) + 1"
+    count = scatter(f"SELECT seed, target, type, db, {rank} FROM interactions",
+                    'INSERT OR IGNORE INTO interactions VALUES (?,?,?,?,?)')
+    if has_top:
+        print("📥 分派 top_edges...")
+        scatter("SELECT seed, rn, target, type, db, type_rn FROM top_edges",
+                'INSERT INTO top_edges VALUES (?,?,?,?,?,?)')
+
+    print("🗑️ 建立各分片索引...")
+    for conn in shards:
+        conn.commit()
+        conn.execute('CREATE INDEX idx_seed_dbcount ON interactions(seed, db_count DESC)')
+        if has_top:
+            conn.execute('CREATE INDEX idx_top_type ON top_edges(seed, type, type_rn)')
+        conn.execute('ANALYZE')
+        conn.commit()
+        conn.execute('PRAGMA journal_mode=DELETE')
+        conn.close()
+    src.close()
+
+    # manifest 記下來源檔的 mtime/大小：regulon.db 重建後分片自動失效，API 退回主資料庫
+    st = os.stat(DB_PATH)
+    with open(os.path.join(SHARD_DIR, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump({"shard_count": SHARD_COUNT, "source_mtime_ns": st.st_mtime_ns, "source_size": st.st_size}, f)
+    print(f"✅ 分片完成！{count} 筆交互作用已分散到 {SHARD_COUNT} 個分片：{SHARD_DIR}")
+
+if __name__ == "__main__":
+    build_shards()
\ No newline at end of file